@@ -0,0 +1,217 @@
+"""Almacén local (SQLite) de órdenes para sincronización incremental.
+
+La primera ejecución descarga la ventana completa de ``ventas_dias``; las
+siguientes solo piden las órdenes con ``modified_after`` posterior a la
+última marca de sincronización y las actualizan en el almacén. Las órdenes
+enviadas a la papelera o borradas no aparecen en ``modified_after``: cada
+``pedidos_reconciliacion_dias`` se vuelve a descargar la ventana completa y
+se eliminan del almacén las que el servidor ya no devuelve.
+"""
+from datetime import datetime, timedelta
+import os
+import sqlite3
+
+import pandas as pd
+
+import columnas_ventas
+from config import CONFIG
+from paginacion import deduplicar_ordenes, obtener_ordenes, obtener_paginas, punto_control_ordenes
+import progreso
+from proyecciones import CAMPOS_ORDENES
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ordenes (
+    id INTEGER PRIMARY KEY,
+    estado TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    fecha_modificacion_gmt TEXT
+);
+CREATE TABLE IF NOT EXISTS items (
+    orden_id INTEGER NOT NULL REFERENCES ordenes(id) ON DELETE CASCADE,
+    posicion INTEGER NOT NULL,
+    producto_id INTEGER NOT NULL,
+    variacion_id INTEGER NOT NULL DEFAULT 0,
+    nombre TEXT,
+    cantidad INTEGER NOT NULL,
+    precio_venta REAL NOT NULL,
+    total REAL NOT NULL,
+    PRIMARY KEY (orden_id, posicion)
+);
+CREATE INDEX IF NOT EXISTS idx_ordenes_fecha ON ordenes(fecha);
+CREATE TABLE IF NOT EXISTS sincronizacion (
+    clave TEXT PRIMARY KEY,
+    valor TEXT
+);
+"""
+
+
+def abrir(ruta=None):
+    """Abre (y crea si hace falta) el almacén de órdenes."""
+    if ruta is None:
+        ruta = CONFIG["pedidos_db"]
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    conn = sqlite3.connect(ruta)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(ESQUEMA)
+    return conn
+
+
+def leer_marca(conn, clave):
+    """Lee una marca de sincronización (``None`` si no existe)."""
+    fila = conn.execute("SELECT valor FROM sincronizacion WHERE clave = ?", (clave,)).fetchone()
+    return fila[0] if fila else None
+
+
+def guardar_marca(conn, clave, valor):
+    """Guarda una marca de sincronización."""
+    conn.execute(
+        "INSERT INTO sincronizacion (clave, valor) VALUES (?, ?) "
+        "ON CONFLICT(clave) DO UPDATE SET valor = excluded.valor",
+        (clave, valor),
+    )
+
+
+def guardar_ordenes(conn, ordenes, avanzar_marca=True):
+    """Inserta o actualiza órdenes y reemplaza sus líneas de producto.
+
+    Con ``avanzar_marca=False`` (descarga incompleta) no se mueve la marca
+    ``modificadas_hasta``, para que la próxima sincronización repita el tramo.
+    """
+    with conn:
+        for orden in ordenes:
+            conn.execute(
+                "INSERT INTO ordenes (id, estado, fecha, fecha_modificacion_gmt) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET estado = excluded.estado, fecha = excluded.fecha, "
+                "fecha_modificacion_gmt = excluded.fecha_modificacion_gmt",
+                (orden['id'], orden['status'], orden['date_created'], orden.get('date_modified_gmt')),
+            )
+            conn.execute("DELETE FROM items WHERE orden_id = ?", (orden['id'],))
+            conn.executemany(
+                "INSERT INTO items (orden_id, posicion, producto_id, variacion_id, nombre, "
+                "cantidad, precio_venta, total) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        orden['id'],
+                        posicion,
+                        item['product_id'],
+                        item.get('variation_id') or 0,
+                        item['name'],
+                        item['quantity'],
+                        float(item['price']),
+                        float(item['total']),
+                    )
+                    for posicion, item in enumerate(orden['line_items'])
+                ],
+            )
+
+        marca = max((o.get('date_modified_gmt') or '' for o in ordenes), default='')
+        if avanzar_marca and marca and marca > (leer_marca(conn, "modificadas_hasta") or ''):
+            guardar_marca(conn, "modificadas_hasta", marca)
+
+
+def requiere_reconciliacion(conn):
+    """Indica si venció la descarga completa periódica (o nunca se hizo)."""
+    ultima = leer_marca(conn, "ultima_completa")
+    if ultima is None:
+        return True
+    return datetime.now() - datetime.fromisoformat(ultima) > timedelta(days=CONFIG["pedidos_reconciliacion_dias"])
+
+
+def eliminar_ausentes(conn, fecha_desde, ids, estados=None):
+    """Borra las órdenes de la ventana en ``estados`` que no están en ``ids``; devuelve cuántas.
+
+    ``ids`` son las órdenes de una descarga completa de la ventana desde
+    ``fecha_desde`` con esos estados: las que faltan fueron a la papelera o
+    se borraron en la tienda.
+    """
+    if estados is None:
+        estados = CONFIG["estados_validos"]
+    marcadores = ", ".join("?" for _ in estados)
+    with conn:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS ids_vigentes (id INTEGER PRIMARY KEY)")
+        conn.execute("DELETE FROM ids_vigentes")
+        conn.executemany("INSERT OR IGNORE INTO ids_vigentes (id) VALUES (?)", ((i,) for i in ids))
+        borradas = conn.execute(
+            f"DELETE FROM ordenes WHERE fecha >= ? AND estado IN ({marcadores}) "
+            "AND id NOT IN (SELECT id FROM ids_vigentes)",
+            [fecha_desde, *estados],
+        ).rowcount
+        conn.execute("DELETE FROM ids_vigentes")
+    return borradas
+
+
+def sincronizar(conn, fecha_desde):
+    """Trae al almacén las órdenes nuevas o modificadas desde la última ejecución.
+
+    Si el almacén no cubre ``fecha_desde`` (primera ejecución o ventana más
+    larga que la anterior) o venció la reconciliación, se descarga la
+    ventana completa, retomando el punto de control si una descarga anterior
+    quedó a medias; la cobertura solo se registra cuando la descarga llega
+    al final, y las órdenes ausentes solo se eliminan si además se hizo
+    entera en esta ejecución.
+    """
+    cobertura = leer_marca(conn, "cobertura_desde")
+    marca = leer_marca(conn, "modificadas_hasta")
+
+    if (
+        cobertura is None or marca is None or fecha_desde < cobertura
+        or requiere_reconciliacion(conn) or progreso.pendiente("ordenes_almacen")
+    ):
+        print("   Sincronización completa de la ventana")
+        punto = punto_control_ordenes("ordenes_almacen", fecha_desde)
+        # Las páginas retomadas son de otra ejecución: les pueden faltar
+        # órdenes nuevas, así que no sirven para decidir qué se borró
+        retomada = bool(punto.paginas)
+        estado = {}
+        ordenes = obtener_ordenes(punto.params["fecha_desde"], punto=punto, estado=estado)
+        guardar_ordenes(conn, ordenes, avanzar_marca=estado["completo"])
+        if estado["completo"]:
+            with conn:
+                guardar_marca(conn, "cobertura_desde", min(punto.params["fecha_desde"], fecha_desde))
+            if not retomada:
+                borradas = eliminar_ausentes(conn, punto.params["fecha_desde"], [o['id'] for o in ordenes])
+                if borradas:
+                    print(f"   🗑️ {borradas} órdenes ya no están en la tienda, se eliminan del almacén")
+                with conn:
+                    guardar_marca(conn, "ultima_completa", datetime.now().isoformat())
+            punto.terminar()
+        return len(ordenes)
+
+    # Solapamiento para no perder órdenes modificadas en el mismo instante
+    # que la marca; reinsertarlas es idempotente.
+    desde = datetime.fromisoformat(marca) - timedelta(minutes=CONFIG["pedidos_solapamiento_minutos"])
+    print(f"   Sincronización incremental (modificadas desde {desde.isoformat()} GMT)")
+    # Sin filtro de estado: una orden que pasa a cancelada debe actualizarse
+    # en el almacén para dejar de contarse.
+    estado = {}
+    ordenes = deduplicar_ordenes(obtener_paginas(
+        "orders",
+        {"modified_after": desde.isoformat(), "dates_are_gmt": "true", "status": "any"},
+        etiqueta="órdenes",
+        campos=CAMPOS_ORDENES,
+        estado=estado,
+    ))
+    guardar_ordenes(conn, ordenes, avanzar_marca=estado["completo"])
+    return len(ordenes)
+
+
+def leer_ventas(conn, fecha_desde, estados=None):
+    """Devuelve las líneas de venta del almacén como DataFrame (mismas columnas que ``extraer_ventas``)."""
+    if estados is None:
+        estados = CONFIG["estados_validos"]
+    marcadores = ", ".join("?" for _ in estados)
+    df_ventas = pd.read_sql_query(
+        f"""
+        SELECT i.producto_id, i.nombre, i.cantidad, i.precio_venta, i.total,
+               o.fecha, o.id AS orden_id, o.estado, i.variacion_id
+        FROM items i JOIN ordenes o ON o.id = i.orden_id
+        WHERE o.fecha >= ? AND o.estado IN ({marcadores})
+        ORDER BY o.id, i.posicion
+        """,
+        conn,
+        params=[fecha_desde, *estados],
+    )
+    return columnas_ventas.tipar(df_ventas)
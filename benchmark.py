@@ -0,0 +1,174 @@
+"""Benchmark de extracción, análisis y reportes contra el servidor mock.
+
+Levanta ``servidor_mock`` en un puerto local, apunta ``WC_API_URL`` a él y
+mide cada fase con cachés desactivadas. El resultado se escribe en JSON
+para poder comparar versiones::
+
+    python benchmark.py --productos 15000 --ordenes 20000 --salida bench.json
+    python benchmark.py --comparar bench_anterior.json
+"""
+import argparse
+from datetime import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+
+import servidor_mock
+
+
+def _commit_actual():
+    """Hash corto del commit actual (``None`` fuera de un repo git)."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def medir(nombre, funcion, repeticiones, resultados):
+    """Ejecuta ``funcion`` ``repeticiones`` veces y guarda sus tiempos en ``resultados``."""
+    tiempos = []
+    valor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        valor = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    resultados[nombre] = {
+        "min_s": min(tiempos),
+        "mediana_s": statistics.median(tiempos),
+        "repeticiones": repeticiones,
+    }
+    print(f"⏱️  {nombre}: {min(tiempos):.3f}s (mediana {statistics.median(tiempos):.3f}s)")
+    return valor
+
+
+def ejecutar(args):
+    """Corre todas las fases y devuelve el diccionario de resultados."""
+    estado = servidor_mock.estado_desde_argumentos(args)
+    servidor, url = servidor_mock.iniciar(estado)
+    os.environ["WC_API_URL"] = url
+
+    # Importar después de fijar WC_API_URL: CONFIG lee el entorno al importarse
+    # (los clientes se crean recién en la primera petición, ya con esa URL)
+    from config import CONFIG
+    CONFIG.update({
+        "catalogo_cache": "",
+        "pedidos_db": "",
+        "variaciones_cache": "",
+        "checkpoint_dir": "",
+        "visitas_api": not args.sin_visitas,
+        "ventas_dias": args.ventas_dias,
+        "peticiones_por_segundo": args.peticiones_por_segundo,
+        "visitas_peticiones_por_segundo": args.peticiones_por_segundo,
+        "rafaga_peticiones": CONFIG["paginas_concurrentes"],
+        "backoff_base_segundos": 0.1,
+    })
+    import main
+    import orders_report
+    import salidas
+
+    fases = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        previo = os.getcwd()
+        os.chdir(directorio)
+        CONFIG["visitas_cache"] = os.path.join(directorio, "visitas.json")
+        try:
+            df_productos = medir("extraer_productos", main.extraer_productos, args.repeticiones, fases)
+            df_variaciones = medir(
+                "extraer_variaciones",
+                lambda: main.extraer_variaciones(df_productos),
+                args.repeticiones, fases,
+            )
+            df_ventas = medir("extraer_ventas", main.extraer_ventas, args.repeticiones, fases)
+            medir(
+                "extraer_ventas_analytics",
+                lambda: main.extraer_ventas_analytics([CONFIG["ventas_dias"], *CONFIG["ventanas_dias"]]),
+                args.repeticiones, fases,
+            )
+            medir("obtener_pedidos", orders_report.obtener_pedidos, args.repeticiones, fases)
+            analisis = medir(
+                "analizar_datos",
+                lambda: main.analizar_datos(df_productos.copy(), df_ventas.copy(), df_variaciones),
+                args.repeticiones, fases,
+            )
+            reporte = medir(
+                "generar_reporte_para_claude",
+                lambda: main.generar_reporte_para_claude(analisis, incluir_detalle=False),
+                args.repeticiones, fases,
+            )
+            medir("generar_markdown", lambda: main.generar_markdown(reporte, "bench"), args.repeticiones, fases)
+            medir(
+                "guardar_salidas",
+                lambda: salidas.guardar_salidas(reporte, analisis, "bench"),
+                args.repeticiones, fases,
+            )
+            medir(
+                "generar_reporte_pedidos",
+                lambda: orders_report.generar_reporte_pedidos(orders_report.iterar_pedidos(), "bench"),
+                args.repeticiones, fases,
+            )
+        finally:
+            os.chdir(previo)
+            servidor.shutdown()
+
+    return {
+        "fecha": datetime.now().isoformat(),
+        "commit": _commit_actual(),
+        "python": platform.python_version(),
+        "parametros": {k: v for k, v in vars(args).items() if k not in ("salida", "comparar")},
+        "filas": {
+            "productos": len(df_productos),
+            "lineas_venta": len(df_ventas),
+        },
+        "servidor": {
+            "peticiones": estado.peticiones,
+            "bytes_enviados": estado.bytes_enviados,
+            "errores_inyectados": estado.errores_inyectados,
+        },
+        "fases": fases,
+    }
+
+
+def comparar(actual, anterior):
+    """Imprime la variación de cada fase respecto de un resultado anterior."""
+    print(f"\n📈 Comparación con {anterior.get('commit') or anterior.get('fecha')}")
+    for fase, medida in actual["fases"].items():
+        previa = anterior.get("fases", {}).get(fase)
+        if not previa:
+            print(f"   {fase}: {medida['min_s']:.3f}s (nueva)")
+            continue
+        delta = (medida["min_s"] - previa["min_s"]) / previa["min_s"] * 100 if previa["min_s"] else 0
+        marca = "🔴" if delta > 10 else "🟢" if delta < -10 else "⚪"
+        print(f"   {marca} {fase}: {previa['min_s']:.3f}s → {medida['min_s']:.3f}s ({delta:+.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark contra un WooCommerce simulado")
+    servidor_mock.agregar_argumentos(parser)
+    parser.add_argument("--ventas-dias", type=int, default=90)
+    parser.add_argument("--repeticiones", type=int, default=1)
+    parser.add_argument("--peticiones-por-segundo", type=float, default=1000,
+                        help="tasa máxima del planificador durante el benchmark")
+    parser.add_argument("--sin-visitas", action="store_true", help="no consultar Post Views Counter")
+    parser.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--comparar", help="resultado JSON anterior contra el cual comparar")
+    args = parser.parse_args()
+
+    resultados = ejecutar(args)
+    texto = json.dumps(resultados, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto)
+        print(f"\n✅ Resultados en {args.salida}")
+    else:
+        print(texto)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(resultados, json.load(f))
@@ -0,0 +1,70 @@
+"""Snapshot local del catálogo de productos con refresco incremental.
+
+El snapshot guarda las filas ya proyectadas de ``extraer_productos`` (sin
+``meta_data``) junto a la marca ``date_modified_gmt`` más reciente vista. Las
+ejecuciones siguientes piden solo ``/products?modified_after=...`` y fusionan
+los cambios; cada ``catalogo_reconciliacion_dias`` se hace una descarga
+completa para detectar productos eliminados.
+"""
+from datetime import datetime, timedelta
+
+import cache_disco
+from config import CONFIG
+
+
+def cargar(ruta=None):
+    """Carga el snapshot del disco (``None`` si no existe o está dañado)."""
+    return cache_disco.cargar(CONFIG["catalogo_cache"] if ruta is None else ruta, "Snapshot de catálogo")
+
+
+def guardar(snapshot, ruta=None):
+    """Escribe el snapshot de forma atómica."""
+    cache_disco.guardar(snapshot, CONFIG["catalogo_cache"] if ruta is None else ruta)
+
+
+def marca_modificacion(productos, actual=None):
+    """Devuelve el ``date_modified_gmt`` más reciente entre ``productos`` y ``actual``."""
+    marcas = [p.get('date_modified_gmt') or '' for p in productos]
+    if actual:
+        marcas.append(actual)
+    return max(marcas, default='') or None
+
+
+def requiere_completa(snapshot):
+    """Indica si toca una descarga completa (sin snapshot o reconciliación vencida)."""
+    if snapshot is None or not snapshot.get("modificados_hasta"):
+        return True
+    ultima = datetime.fromisoformat(snapshot["ultima_completa"])
+    return datetime.now() - ultima > timedelta(days=CONFIG["catalogo_reconciliacion_dias"])
+
+
+def nuevo(filas, marca):
+    """Crea un snapshot a partir de una descarga completa."""
+    return {
+        "version": 1,
+        "modificados_hasta": marca,
+        "ultima_completa": datetime.now().isoformat(),
+        "productos": filas,
+    }
+
+
+def parametros_incrementales(snapshot):
+    """Parámetros de ``/products`` para pedir solo lo modificado desde el snapshot."""
+    desde = datetime.fromisoformat(snapshot["modificados_hasta"]) - timedelta(
+        minutes=CONFIG["catalogo_solapamiento_minutos"]
+    )
+    return {"modified_after": desde.isoformat(), "dates_are_gmt": "true"}
+
+
+def fusionar(snapshot, filas, marca):
+    """Reemplaza en el snapshot las filas modificadas y agrega las nuevas."""
+    posiciones = {fila['id']: i for i, fila in enumerate(snapshot["productos"])}
+    for fila in filas:
+        posicion = posiciones.get(fila['id'])
+        if posicion is None:
+            posiciones[fila['id']] = len(snapshot["productos"])
+            snapshot["productos"].append(fila)
+        else:
+            snapshot["productos"][posicion] = fila
+    snapshot["modificados_hasta"] = marca
+    return snapshot
@@ -0,0 +1,55 @@
+"""Cachés JSON en disco compartidas por el catálogo, las visitas y las variaciones.
+
+Cada caché es un archivo JSON (comprimido con gzip si la ruta termina en
+``.gz``) que se escribe de forma atómica. Las cachés por id con TTL guardan
+``{id: [valor, timestamp]}``; ``pendientes`` dice qué ids hay que volver a
+consultar. Una ruta vacía desactiva la caché.
+"""
+import gzip
+import json
+import os
+import time
+
+
+def _abrir(ruta, modo, comprimido):
+    if comprimido:
+        return gzip.open(ruta, modo + "t", encoding="utf-8")
+    return open(ruta, modo, encoding="utf-8")
+
+
+def cargar(ruta, nombre):
+    """Contenido de ``ruta`` (``None`` si no hay ruta, no existe o está dañado)."""
+    if not ruta or not os.path.exists(ruta):
+        return None
+    try:
+        with _abrir(ruta, "r", ruta.endswith(".gz")) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ {nombre} ilegible, se descarta: {str(e)[:50]}")
+        return None
+
+
+def guardar(datos, ruta):
+    """Escribe ``datos`` en ``ruta`` de forma atómica (nada si no hay ruta)."""
+    if not ruta:
+        return
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    temporal = f"{ruta}.tmp"
+    with _abrir(temporal, "w", ruta.endswith(".gz")) as f:
+        json.dump(datos, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def cargar_por_id(ruta, nombre):
+    """Caché ``{id: [valor, timestamp]}`` con las claves como enteros (vacía si no hay)."""
+    datos = cargar(ruta, nombre)
+    return {int(k): v for k, v in datos.items()} if datos else {}
+
+
+def pendientes(cache, ids, ttl_horas, ahora=None):
+    """Ids de ``ids`` que no están en ``cache`` o cuyo valor venció."""
+    ahora = time.time() if ahora is None else ahora
+    ttl = ttl_horas * 3600
+    return [i for i in ids if i not in cache or ahora - cache[i][1] > ttl]
@@ -0,0 +1,144 @@
+"""Punto de entrada único con subcomandos.
+
+    python cli.py products [--full-refresh] [--offline] [--grabar|--reproducir [ZIP]]
+    python cli.py orders [--dias N] [--grabar|--reproducir [ZIP]]
+    python cli.py analyze [--full-refresh] [--grabar|--reproducir [ZIP]]
+    python cli.py report reporte_precios_<timestamp>.json
+
+Arranca solo con ``argparse``: cada subcomando importa lo que necesita al
+ejecutarse, así que pandas se carga solo en ``products`` y ``analyze``, y el
+cliente HTTP (requests, urllib3) solo cuando se hace la primera petición.
+``products --offline`` y ``report`` no tocan ninguno de los dos.
+"""
+import argparse
+from datetime import datetime
+import os
+import re
+
+
+def _timestamp():
+    return datetime.now().strftime("%Y%m%d_%H%M%S")
+
+
+def comando_products(args):
+    """Escribe el catálogo en ``productos_<timestamp>.csv``."""
+    ruta = f"productos_{_timestamp()}.csv"
+    if args.offline:
+        # Directo del snapshot, sin red ni pandas
+        import csv
+
+        import cache_catalogo
+
+        snapshot = cache_catalogo.cargar()
+        if snapshot is None:
+            print("⚠️  No hay snapshot del catálogo; ejecuta `products` sin --offline primero.")
+            return 1
+        productos = snapshot["productos"]
+        columnas = list(dict.fromkeys(clave for fila in productos for clave in fila))
+        with open(ruta, "w", encoding="utf-8", newline="") as f:
+            escritor = csv.DictWriter(f, fieldnames=columnas)
+            escritor.writeheader()
+            escritor.writerows(productos)
+        print(f"📦 {len(productos)} productos del snapshot ({snapshot['ultima_completa'][:10]}, "
+              f"modificados hasta {snapshot['modificados_hasta']})")
+    else:
+        import main
+        import metricas
+
+        with metricas.fase("extraccion_productos", "products") as fase:
+            df_productos = main.extraer_productos(full_refresh=args.full_refresh)
+            fase["filas"] = len(df_productos)
+        if df_productos.empty:
+            print("⚠️  No se pudieron extraer productos.")
+            return 1
+        df_productos.to_csv(ruta, index=False)
+        metricas.exportar("products", _timestamp())
+    print(f"✅ {ruta}")
+    return 0
+
+
+def comando_orders(args):
+    """Reporte Markdown de pedidos (no usa pandas)."""
+    import orders_report
+
+    orders_report.main(dias=args.dias)
+    return 0
+
+
+def comando_analyze(args):
+    """Extracción, análisis y todos los reportes (lo mismo que ``main.py``)."""
+    import main
+
+    main.main(full_refresh=args.full_refresh)
+    return 0
+
+
+def comando_report(args):
+    """Regenera el Markdown legible desde un ``reporte_precios_*.json`` ya escrito."""
+    import gzip
+    import json
+
+    from escritor_reportes import generar_markdown
+
+    abrir = gzip.open if args.reporte.endswith(".gz") else open
+    with abrir(args.reporte, "rt", encoding="utf-8") as f:
+        reporte = json.load(f)
+    # Mismo timestamp que el reporte de origen, si el nombre lo trae
+    encontrado = re.search(r"(\d{8}_\d{6})", os.path.basename(args.reporte))
+    timestamp = encontrado.group(1) if encontrado else _timestamp()
+    generar_markdown(reporte, timestamp)
+    print(f"✅ reporte_legible_{timestamp}.md")
+    return 0
+
+
+def _aplicar_grabacion(args):
+    """Activa ``--grabar``/``--reproducir`` antes de la primera petición."""
+    if getattr(args, "grabar", None) is None and getattr(args, "reproducir", None) is None:
+        return
+    from config import configurar_grabacion
+
+    if args.grabar is not None:
+        configurar_grabacion("grabar", args.grabar)
+    else:
+        configurar_grabacion("reproducir", args.reproducir)
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="Análisis de precios, ventas y visitas de WooCommerce")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    # Opciones de los subcomandos que consultan la API
+    con_api = argparse.ArgumentParser(add_help=False)
+    modo = con_api.add_mutually_exclusive_group()
+    modo.add_argument("--grabar", nargs="?", const="", metavar="ZIP",
+                      help="graba las respuestas de la API (por defecto en grabacion_archivo)")
+    modo.add_argument("--reproducir", nargs="?", const="", metavar="ZIP",
+                      help="responde desde una grabación, sin acceso a la red")
+
+    products = subcomandos.add_parser("products", parents=[con_api],
+                                      help="descarga el catálogo y lo escribe en CSV")
+    products.add_argument("--full-refresh", action="store_true",
+                          help="ignora el snapshot del catálogo y descarga todos los productos")
+    products.add_argument("--offline", action="store_true",
+                          help="usa solo el snapshot local, sin consultar la API")
+    products.set_defaults(funcion=comando_products)
+
+    orders = subcomandos.add_parser("orders", parents=[con_api], help="reporte Markdown de pedidos del período")
+    orders.add_argument("--dias", type=int, help="días hacia atrás (por defecto ventas_dias)")
+    orders.set_defaults(funcion=comando_orders)
+
+    analyze = subcomandos.add_parser("analyze", parents=[con_api], help="análisis completo y reportes JSON/CSV/Parquet/Markdown")
+    analyze.add_argument("--full-refresh", action="store_true",
+                         help="ignora el snapshot del catálogo y descarga todos los productos")
+    analyze.set_defaults(funcion=comando_analyze)
+
+    report = subcomandos.add_parser("report", help="regenera el Markdown desde un reporte JSON")
+    report.add_argument("reporte", help="ruta de reporte_precios_<timestamp>.json (o .json.gz)")
+    report.set_defaults(funcion=comando_report)
+    return parser
+
+
+if __name__ == "__main__":
+    args = crear_parser().parse_args()
+    _aplicar_grabacion(args)
+    raise SystemExit(args.funcion(args))
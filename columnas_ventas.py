@@ -0,0 +1,106 @@
+"""Líneas de venta acumuladas en columnas tipadas.
+
+En vez de un dict por línea que se convierte a DataFrame al final,
+``ColumnasVentas`` agrega cada línea a buffers ``array`` por columna:
+enteros de 32 bits para ids y cantidades, ``float64`` para montos, códigos
+enteros para estado y nombre (que pasan a ``category``) y la fecha de cada
+orden una sola vez, que se convierte a ``datetime64`` al armar el
+DataFrame. Las columnas numéricas se construyen sobre los buffers sin
+copiarlos (``np.frombuffer``).
+"""
+from array import array
+
+import numpy as np
+import pandas as pd
+
+COLUMNAS = ['producto_id', 'nombre', 'cantidad', 'precio_venta', 'total', 'fecha', 'orden_id', 'estado', 'variacion_id']
+
+# Tipos de ``df_ventas`` (también los del almacén de órdenes)
+TIPOS = {
+    'producto_id': 'int32',
+    'nombre': 'category',
+    'cantidad': 'int32',
+    'precio_venta': 'float64',
+    'total': 'float64',
+    'orden_id': 'int32',
+    'estado': 'category',
+    'variacion_id': 'int32',
+}
+
+
+def _codigo(codigos, valor):
+    """Código de ``valor`` en ``codigos`` (lo agrega si es nuevo); -1 para ``None``."""
+    if valor is None:
+        return -1
+    codigo = codigos.get(valor)
+    if codigo is None:
+        codigo = codigos[valor] = len(codigos)
+    return codigo
+
+
+def _categorica(codigos, categorias):
+    """``Categorical`` a partir de un buffer de códigos y el mapa ``{valor: código}``."""
+    return pd.Categorical.from_codes(np.frombuffer(codigos, dtype=np.int32), categories=list(categorias))
+
+
+class ColumnasVentas:
+    """Acumulador de líneas de venta por columnas."""
+
+    def __init__(self):
+        self.producto_id = array('i')
+        self.variacion_id = array('i')
+        self.cantidad = array('i')
+        self.precio_venta = array('d')
+        self.total = array('d')
+        self.orden_id = array('i')
+        self.nombre = array('i')
+        self.estado = array('i')
+        # Posición de la orden de cada línea en ``fechas_orden``
+        self.orden_posicion = array('i')
+        self.fechas_orden = []
+        self.nombres = {}
+        self.estados = {}
+
+    def __len__(self):
+        return len(self.producto_id)
+
+    def agregar_ordenes(self, ordenes):
+        """Agrega las líneas de producto de ``ordenes``."""
+        for orden in ordenes:
+            posicion = len(self.fechas_orden)
+            self.fechas_orden.append(orden['date_created'])
+            estado = _codigo(self.estados, orden['status'])
+            for item in orden['line_items']:
+                self.producto_id.append(item['product_id'])
+                self.nombre.append(_codigo(self.nombres, item['name']))
+                self.cantidad.append(item['quantity'])
+                self.precio_venta.append(float(item['price']))
+                self.total.append(float(item['total']))
+                self.orden_id.append(orden['id'])
+                self.estado.append(estado)
+                self.variacion_id.append(item.get('variation_id') or 0)
+                self.orden_posicion.append(posicion)
+
+    def dataframe(self):
+        """Arma ``df_ventas`` con las columnas de ``COLUMNAS`` ya tipadas."""
+        fechas = pd.to_datetime(pd.Series(self.fechas_orden, dtype=object), errors='coerce', format='ISO8601')
+        columnas = {
+            'producto_id': np.frombuffer(self.producto_id, dtype=np.int32),
+            'nombre': _categorica(self.nombre, self.nombres),
+            'cantidad': np.frombuffer(self.cantidad, dtype=np.int32),
+            'precio_venta': np.frombuffer(self.precio_venta, dtype=np.float64),
+            'total': np.frombuffer(self.total, dtype=np.float64),
+            'fecha': fechas.to_numpy()[np.frombuffer(self.orden_posicion, dtype=np.int32)],
+            'orden_id': np.frombuffer(self.orden_id, dtype=np.int32),
+            'estado': _categorica(self.estado, self.estados),
+            'variacion_id': np.frombuffer(self.variacion_id, dtype=np.int32),
+        }
+        return pd.DataFrame(columnas, columns=COLUMNAS, copy=False)
+
+
+def tipar(df_ventas):
+    """Lleva un ``df_ventas`` armado de otra forma (p. ej. desde SQLite) a los tipos de ``TIPOS``."""
+    df_ventas = df_ventas.astype({c: t for c, t in TIPOS.items() if c in df_ventas})
+    if 'fecha' in df_ventas:
+        df_ventas['fecha'] = pd.to_datetime(df_ventas['fecha'], errors='coerce', format='ISO8601')
+    return df_ventas
@@ -1,21 +1,32 @@
-from woocommerce import API
 import os
-import urllib3
-
-# Suprimir warnings SSL
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+import threading
 
 CONFIG = {
     "api_url": os.environ.get("WC_API_URL", "https://mcielectronics.cl"),  # ⚠️ CAMBIA ESTO
     "consumer_key": os.environ.get("WC_CONSUMER_KEY", "ck_0c58ea3ea68db031865637fdafa225cb250ebb0b"),  # ⚠️ CAMBIA ESTO
     "consumer_secret": os.environ.get("WC_CONSUMER_SECRET", "cs_c80f40c74567be7a19da7d157a407ab727bc557a"),  # ⚠️ CAMBIA ESTO
     "api_version": "wc/v3",
-    "timeout": 30,
+    "timeout_conexion": 10,
+    "timeout_lectura": 30,
     "per_page": 100,
     "max_reintentos": 3,
-    "sleep_between_pages": 1,
-    "retry_sleep_seconds": 5,
+    "proyeccion_campos": True,
+    "paginas_concurrentes": 4,
+    "peticiones_por_segundo": 4,
+    "peticiones_por_segundo_min": 0.5,
+    "rafaga_peticiones": 4,
+    "backoff_base_segundos": 2,
+    "backoff_max_segundos": 60,
+    "catalogo_cache": os.environ.get("WC_CATALOGO_CACHE", "cache/catalogo.json.gz"),
+    "catalogo_solapamiento_minutos": 5,
+    "catalogo_reconciliacion_dias": 7,
     "ventas_dias": 90,
+    "ventanas_dias": [7, 30],
+    "pedidos_db": os.environ.get("WC_PEDIDOS_DB", "cache/pedidos.sqlite3"),
+    "pedidos_solapamiento_minutos": 5,
+    "pedidos_reconciliacion_dias": 7,
+    "checkpoint_dir": os.environ.get("WC_CHECKPOINT_DIR", "cache/progreso"),
+    "checkpoint_max_horas": 48,
     "estados_validos": [
         "completed",
         "processing",
@@ -28,6 +39,21 @@ CONFIG = {
         "post_views_count",
         "_eael_post_view_count",
     ],
+    "visitas_api": True,
+    "visitas_api_version": "post-views-counter",
+    "visitas_cache": os.environ.get("WC_VISITAS_CACHE", "cache/visitas.json"),
+    "visitas_ttl_horas": 24,
+    "visitas_concurrentes": 8,
+    "visitas_peticiones_por_segundo": 10,
+    "visitas_max_404": 5,
+    "ventas_origen": os.environ.get("WC_VENTAS_ORIGEN", "ordenes"),
+    "analytics_api_version": "wc-analytics",
+    "historial_dir": os.environ.get("WC_HISTORIAL_DIR", "cache/historial"),
+    "historial_min_dias": 7,
+    "historial_cobertura_min": 0.5,
+    "variaciones": True,
+    "variaciones_cache": os.environ.get("WC_VARIACIONES_CACHE", "cache/variaciones.json.gz"),
+    "variaciones_ttl_horas": 24,
     "visitas_muchas_sin_ventas": 50,
     "visitas_baja_conversion": 20,
     "visitas_alta_conversion": 10,
@@ -36,12 +62,143 @@ CONFIG = {
     "stock_minimo_sin_visitas": 5,
     "min_ventas_oportunidad_precio": 10,
     "umbral_diferencia_precio_pct": 0.1,
+    "reporte_bloque_bytes": 1 << 16,
+    "salida_json_comprimido": False,
+    "salida_csv_comprimido": False,
+    "salida_parquet": True,
+    "tiendas_archivo": os.environ.get("WC_TIENDAS", "tiendas.json"),
+    "tiendas_procesos": None,
+    "servicio_host": "127.0.0.1",
+    "servicio_puerto": int(os.environ.get("WC_SERVICIO_PUERTO", 8765)),
+    "servicio_intervalo_minutos": 30,
+    "metricas_dir": os.environ.get("WC_METRICAS_DIR", "metricas"),
+    "grabacion_modo": os.environ.get("WC_GRABACION", ""),
+    "grabacion_archivo": os.environ.get("WC_GRABACION_ARCHIVO", "grabaciones/api.zip"),
 }
 
-wcapi = API(
-    url=CONFIG["api_url"],
-    consumer_key=CONFIG["consumer_key"],
-    consumer_secret=CONFIG["consumer_secret"],
-    version=CONFIG["api_version"],
-    timeout=CONFIG["timeout"],
+# Clientes HTTP: se crean al primer uso (``config.wcapi``, ``from config
+# import pvcapi``) para que importar la configuración no cargue requests ni
+# urllib3 en los comandos que no hablan con la API
+CLIENTES = ("sesion", "wcapi", "pvcapi", "analyticsapi")
+_lock_clientes = threading.Lock()
+
+
+def _crear_clientes():
+    """Crea la sesión compartida y los clientes de WooCommerce, Post Views Counter y Analytics."""
+    if CONFIG["grabacion_modo"] == "reproducir":
+        # Sin sesión ni red: todo sale de la grabación
+        from grabacion import ClienteReproductor, Grabacion
+
+        grabacion = Grabacion(CONFIG["grabacion_archivo"])
+        return {
+            "sesion": None,
+            "wcapi": ClienteReproductor(grabacion, CONFIG["api_version"]),
+            "pvcapi": ClienteReproductor(grabacion, CONFIG["visitas_api_version"]),
+            "analyticsapi": ClienteReproductor(grabacion, CONFIG["analytics_api_version"]),
+        }
+
+    import urllib3
+
+    from transporte import ClienteWC, crear_sesion
+
+    # Suprimir warnings SSL
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    # Una sola sesión con keep-alive para ambos clientes: mismo host, mismo pool
+    sesion = crear_sesion(max(CONFIG["paginas_concurrentes"], CONFIG["visitas_concurrentes"]))
+
+    wcapi = ClienteWC(
+        url=CONFIG["api_url"],
+        consumer_key=CONFIG["consumer_key"],
+        consumer_secret=CONFIG["consumer_secret"],
+        version=CONFIG["api_version"],
+        timeout=(CONFIG["timeout_conexion"], CONFIG["timeout_lectura"]),
+        sesion=sesion,
+    )
+
+    # Post Views Counter expone /wp-json/post-views-counter/get-post-views/<id>
+    pvcapi = ClienteWC(
+        url=CONFIG["api_url"],
+        consumer_key=CONFIG["consumer_key"],
+        consumer_secret=CONFIG["consumer_secret"],
+        version=CONFIG["visitas_api_version"],
+        timeout=(CONFIG["timeout_conexion"], CONFIG["timeout_lectura"]),
+        sesion=sesion,
+    )
+
+    # WooCommerce Analytics expone /wp-json/wc-analytics/reports/...
+    analyticsapi = ClienteWC(
+        url=CONFIG["api_url"],
+        consumer_key=CONFIG["consumer_key"],
+        consumer_secret=CONFIG["consumer_secret"],
+        version=CONFIG["analytics_api_version"],
+        timeout=(CONFIG["timeout_conexion"], CONFIG["timeout_lectura"]),
+        sesion=sesion,
+    )
+
+    if CONFIG["grabacion_modo"] == "grabar":
+        from grabacion import ArchivoGrabacion, ClienteGrabador
+
+        archivo = ArchivoGrabacion(CONFIG["grabacion_archivo"])
+        wcapi, pvcapi, analyticsapi = (ClienteGrabador(c, archivo) for c in (wcapi, pvcapi, analyticsapi))
+    return {"sesion": sesion, "wcapi": wcapi, "pvcapi": pvcapi, "analyticsapi": analyticsapi}
+
+
+def __getattr__(nombre):
+    if nombre not in CLIENTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    with _lock_clientes:
+        if "wcapi" not in globals():
+            # Desde aquí son atributos normales del módulo
+            globals().update(_crear_clientes())
+    return globals()[nombre]
+
+
+# Cachés y estado local entre ejecuciones; cada tienda del modo multitienda
+# los tiene por separado
+RUTAS_POR_TIENDA = (
+    "catalogo_cache", "pedidos_db", "visitas_cache", "variaciones_cache", "checkpoint_dir", "historial_dir",
 )
+
+
+def configurar_grabacion(modo, ruta=None):
+    """Activa la grabación (``"grabar"``) o reproducción (``"reproducir"``) de la API.
+
+    Desactiva las cachés locales para que la grabación tenga las
+    descargas completas y la reproducción no mezcle datos de otras
+    ejecuciones. Debe llamarse antes de la primera petición.
+    """
+    if modo not in ("grabar", "reproducir"):
+        raise ValueError(f"grabacion_modo desconocido: {modo!r}")
+    CONFIG["grabacion_modo"] = modo
+    if ruta:
+        CONFIG["grabacion_archivo"] = ruta
+    for clave in RUTAS_POR_TIENDA:
+        CONFIG[clave] = ""
+    with _lock_clientes:
+        for nombre in CLIENTES:
+            globals().pop(nombre, None)
+
+
+def configurar_tienda(tienda):
+    """Aplica la configuración de una tienda (ver ``multitienda.py``) en este proceso.
+
+    ``tienda`` trae ``nombre``, ``api_url``, ``consumer_key``,
+    ``consumer_secret`` y opcionalmente cualquier otra clave de ``CONFIG``.
+    Las cachés sin valor explícito pasan a un subdirectorio con el nombre de
+    la tienda, y los clientes ya creados se reapuntan a la tienda (si aún no
+    se crearon, nacen con la configuración de la tienda).
+    """
+    nombre = tienda["nombre"]
+    for clave in RUTAS_POR_TIENDA:
+        ruta = CONFIG[clave]
+        if clave not in tienda and ruta:
+            CONFIG[clave] = os.path.join(os.path.dirname(ruta), nombre, os.path.basename(ruta))
+    CONFIG.update({k: v for k, v in tienda.items() if k != "nombre"})
+    if "wcapi" in globals():
+        for cliente in (wcapi, pvcapi, analyticsapi):
+            cliente.configurar(CONFIG["api_url"], CONFIG["consumer_key"], CONFIG["consumer_secret"])
+
+
+if CONFIG["grabacion_modo"]:
+    configurar_grabacion(CONFIG["grabacion_modo"])
@@ -0,0 +1,131 @@
+"""Decodificación de respuestas JSON contaminadas con avisos de PHP.
+
+Trabaja directamente sobre los bytes de la respuesta: si el cuerpo empieza
+con JSON (también un número o una cadena sueltos) se parsea sin copias; si
+no, prueba como inicio del JSON el primer ``[``/``{`` de cada línea o tras
+cada ``>`` del prefijo de avisos (un ``[`` en medio del propio aviso no
+engaña al decodificador) y, si ninguno sirve, los primeros ``[``/``{`` del
+cuerpo, para avisos de texto pegados al JSON. Solo se miran los primeros
+``LIMITE_PREFIJO`` bytes y a lo sumo ``MAX_CANDIDATOS`` inicios de cada
+tipo, así que un cuerpo truncado falla tras unas pocas pasadas y no una por
+cada corchete. Usa ``orjson`` si está instalado. Los avisos descartados se
+cuentan por tipo para poder reportarlos.
+"""
+from collections import Counter
+from itertools import islice
+import json
+import re
+import threading
+
+try:
+    import orjson
+except ImportError:  # dependencia opcional
+    orjson = None
+
+PATRON_AVISO = re.compile(rb"(Warning|Notice|Deprecated|Strict Standards|Fatal error|Parse error)")
+ESPACIOS = b" \t\r\n"
+BOM = b"\xef\xbb\xbf"
+# Dónde puede empezar el JSON después de un aviso: primer [ o { de una línea o tras una etiqueta
+PATRON_INICIO = re.compile(rb"[\n>][ \t\r\n]*[\[{]")
+# Si ninguno de esos sirve (aviso de texto pegado al cuerpo), cualquier [ o {
+PATRON_CORCHETE = re.compile(rb"[\[{]")
+LIMITE_PREFIJO = 1 << 16
+MAX_CANDIDATOS = 8
+# Primer byte de un cuerpo que es JSON de entrada (incluye números y cadenas sueltos)
+INICIO_JSON = b'[{"-0123456789'
+
+_SIN_JSON = object()
+_avisos = Counter()
+_ejemplos = {}
+_lock = threading.Lock()
+
+
+def _parsear(contenido):
+    """Parsea bytes o memoryview con el backend más rápido disponible."""
+    if orjson is not None:
+        return orjson.loads(contenido)
+    if isinstance(contenido, memoryview):
+        contenido = contenido.tobytes()
+    return json.loads(contenido)
+
+
+def _registrar_avisos(prefijo):
+    """Cuenta los avisos de PHP presentes en ``prefijo``."""
+    tipos = [m.group(1).decode() for m in PATRON_AVISO.finditer(prefijo)] or ["otros"]
+    with _lock:
+        for tipo in tipos:
+            _avisos[tipo] += 1
+            if tipo not in _ejemplos:
+                _ejemplos[tipo] = " ".join(prefijo[:200].decode("utf-8", "replace").split())
+
+
+def decodificar(contenido):
+    """Devuelve el JSON contenido en ``contenido`` (bytes), saltando prefijos de PHP/HTML.
+
+    Lanza ``ValueError`` si no hay JSON válido en el cuerpo.
+
+    >>> decodificar(b'<br />\\n<b>Warning</b>: x on line <b>3</b><br />\\n[1]')
+    [1]
+    >>> decodificar(b'PHP Notice: foo on line 3[{"a":1}]')
+    [{'a': 1}]
+    >>> decodificar(b'Warning: bar{"a":1}')
+    {'a': 1}
+    """
+    inicio = 0
+    if contenido.startswith(BOM):
+        inicio = len(BOM)
+    while inicio < len(contenido) and contenido[inicio] in ESPACIOS:
+        inicio += 1
+
+    vista = memoryview(contenido)
+    if inicio < len(contenido) and contenido[inicio] in INICIO_JSON:
+        try:
+            return _parsear(vista[inicio:] if inicio else contenido)
+        except ValueError:
+            # p. ej. un aviso con formato de log: "[17-Oct-2026 ...] PHP Warning"
+            pass
+
+    # Prefijo de avisos: cada candidato que no es el JSON cuesta una pasada
+    # por el resto del cuerpo, así que se prueban pocos y solo en la zona
+    # del prefijo
+    fin = min(len(contenido), inicio + LIMITE_PREFIJO)
+    probadas = set()
+    for patron in (PATRON_INICIO, PATRON_CORCHETE):
+        posiciones = (m.end() - 1 for m in patron.finditer(contenido, inicio, fin))
+        for posicion in islice((p for p in posiciones if p not in probadas), MAX_CANDIDATOS):
+            probadas.add(posicion)
+            data = _probar(vista, contenido, posicion)
+            if data is not _SIN_JSON:
+                return data
+    raise ValueError("no JSON")
+
+
+def _probar(vista, contenido, posicion):
+    """JSON desde ``posicion`` (registrando el prefijo como aviso) o ``_SIN_JSON``."""
+    try:
+        data = _parsear(vista[posicion:])
+    except ValueError:
+        return _SIN_JSON
+    _registrar_avisos(contenido[:posicion])
+    return data
+
+
+def decodificar_respuesta(response):
+    """Decodifica el cuerpo de una respuesta de ``requests`` sin pasar por ``response.text``."""
+    return decodificar(response.content)
+
+
+def resumen_avisos():
+    """Devuelve ``{tipo: cantidad}`` de avisos de PHP descartados hasta ahora."""
+    with _lock:
+        return dict(_avisos)
+
+
+def imprimir_resumen_avisos():
+    """Muestra cuántos avisos de PHP se descartaron, con un ejemplo de cada tipo."""
+    resumen = resumen_avisos()
+    if not resumen:
+        return
+    print(f"\n🐘 Avisos de PHP descartados: {sum(resumen.values())}")
+    for tipo, cantidad in sorted(resumen.items(), key=lambda x: x[1], reverse=True):
+        print(f"   - {tipo}: {cantidad} (ej.: {_ejemplos[tipo][:80]})")
@@ -0,0 +1,158 @@
+"""Escritura de reportes Markdown por bloques, en tiempo lineal.
+
+Los generadores de reportes van agregando secciones al escritor en vez de
+concatenar un string creciente; el escritor junta los trozos y los vuelca
+al archivo cada ``CONFIG["reporte_bloque_bytes"]``, así que la memoria queda
+acotada por el tamaño del bloque y no por el del documento.
+
+``generar_markdown`` arma el reporte legible a partir del dict del reporte
+(no necesita pandas), así que también se puede regenerar desde un
+``reporte_precios_*.json`` ya escrito.
+"""
+from config import CONFIG
+
+
+class EscritorMarkdown:
+    """Escribe un documento Markdown a disco en bloques."""
+
+    def __init__(self, ruta, tamano_bloque=None):
+        self.ruta = ruta
+        self.tamano_bloque = tamano_bloque or CONFIG["reporte_bloque_bytes"]
+        self.partes = []
+        self.pendiente = 0
+        self.archivo = None
+
+    def __enter__(self):
+        self.archivo = open(self.ruta, "w", encoding="utf-8", buffering=self.tamano_bloque)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self.vaciar()
+        finally:
+            self.archivo.close()
+        return False
+
+    def escribir(self, *partes):
+        """Agrega texto al documento."""
+        for parte in partes:
+            self.partes.append(parte)
+            self.pendiente += len(parte)
+        if self.pendiente >= self.tamano_bloque:
+            self.vaciar()
+
+    def titulo(self, texto, nivel=2):
+        """Agrega un encabezado ``#``."""
+        self.escribir(f"\n{'#' * nivel} {texto}\n\n")
+
+    def item(self, texto, *detalles, prefijo="-"):
+        """Agrega un ítem de lista con líneas de detalle indentadas.
+
+        Los detalles van a 2 espacios bajo ``-`` y a 3 bajo un número
+        (también desde el 10, como el reporte original).
+        """
+        sangria = "  " if prefijo == "-" else "   "
+        self.escribir(f"{prefijo} {texto}\n", *(f"{sangria}- {d}\n" for d in detalles))
+
+    def vaciar(self):
+        """Vuelca al archivo lo acumulado."""
+        if self.partes:
+            self.archivo.write("".join(self.partes))
+            self.partes.clear()
+            self.pendiente = 0
+
+
+def _visitas(producto):
+    """Visitas del período (reportes anteriores al historial solo traen el acumulado)."""
+    return int(producto.get('visitas_periodo', producto['visitas']))
+
+
+def generar_markdown(reporte, timestamp):
+    """Genera reporte en formato Markdown para fácil lectura"""
+    with EscritorMarkdown(f'reporte_legible_{timestamp}.md') as md:
+        md.escribir(f"""# Reporte de Análisis de Precios
+    
+**Fecha:** {reporte['fecha_analisis']}
+**Período:** {reporte['periodo_analizado']}
+""")
+        
+        if not reporte.get('datos_completos', True):
+            md.escribir("\n> ⚠️ **Datos incompletos:** faltaron páginas en la extracción, las cifras "
+                        "están por debajo de lo real. La próxima ejecución retoma desde donde quedó.\n")
+            for falta in reporte['datos_incompletos']:
+                md.escribir(f"> - {falta['extraccion']} {falta['detalle']}".rstrip() + "\n")
+        
+        md.escribir(f"""
+## 📊 Resumen Ejecutivo
+
+- Total productos: {reporte['resumen']['total_productos']}
+- Sin ventas: {reporte['resumen']['productos_sin_ventas']}
+- Sin visitas: {reporte['resumen']['productos_sin_visitas']}
+- Sin visitas con stock alto: {reporte['resumen']['productos_sin_visitas_con_stock']}
+- Bestsellers por volumen: {reporte['resumen']['productos_bestseller_volumen']}
+- Top facturadores: {reporte['resumen']['productos_top_facturadores']}
+- Ingreso total: ${reporte['resumen']['ingreso_total']:,.2f}
+- Unidades vendidas: {reporte['resumen']['unidades_vendidas_total']:,}
+- Visitas totales: {reporte['resumen']['visitas_totales']:,}
+- Tasa conversión promedio: {reporte['resumen']['tasa_conversion_promedio']:.2f}%
+- Ticket promedio: ${reporte['resumen']['ticket_promedio']:,.2f}
+""")
+        
+        if reporte.get('historial_visitas'):
+            historial = reporte['historial_visitas']
+            md.escribir(f"- Visitas del período: {reporte['resumen']['visitas_periodo']:,} "
+                        f"(desde la foto del {historial['fecha_base']}, {historial['dias']} días)\n")
+        
+        if reporte.get('ventanas'):
+            md.titulo("📅 Comparación por Ventana")
+            for ventana, datos in reporte['ventanas'].items():
+                md.item(
+                    f"**Últimos {ventana[:-1]} días:** {datos['unidades_vendidas']:,} unidades, "
+                    f"${datos['ingreso_total']:,.0f} (${datos['facturacion_dia']:,.0f}/día), "
+                    f"{datos['productos_con_ventas']} productos con ventas",
+                )
+        
+        md.titulo("🚫 Productos SIN VISITAS con Stock Alto (urgente)")
+        for p in reporte['productos_sin_visitas_stock_alto'][:10]:
+            md.item(
+                f"**{p['nombre']}** (SKU: {p['sku']})",
+                f"Precio: ${p['precio_actual']} | Stock: {int(p['stock'])} | Valor: ${p.get('valor_stock', 0):,.0f}",
+                f"Visitas: {_visitas(p)} | Ventas: {int(p['cantidad'])}",
+            )
+        
+        md.titulo("👀 Productos con MUCHAS VISITAS pero SIN VENTAS")
+        for p in reporte['muchas_visitas_sin_ventas'][:10]:
+            md.item(
+                f"**{p['nombre']}** - {_visitas(p)} visitas, 0 ventas",
+                f"Precio: ${p['precio_actual']} | Stock: {int(p['stock'])}",
+            )
+        
+        md.titulo("⚠️ Productos con BAJA CONVERSIÓN (visitas pero pocas ventas)")
+        for p in reporte['baja_conversion'][:10]:
+            md.item(
+                f"**{p['nombre']}** - Conversión: {p['tasa_conversion']:.2f}%",
+                f"Visitas: {_visitas(p)} | Ventas: {int(p['cantidad'])} | Precio: ${p['precio_actual']}",
+            )
+        
+        md.titulo("✅ Productos con ALTA CONVERSIÓN (éxitos)")
+        for p in reporte['alta_conversion'][:10]:
+            md.item(
+                f"**{p['nombre']}** - Conversión: {p['tasa_conversion']:.2f}%",
+                f"Visitas: {_visitas(p)} | Ventas: {int(p['cantidad'])} | Ingresos: ${p['total_vendido']:,.0f}",
+            )
+        
+        md.titulo("💰 Top 10 Facturadores (más ingresos)")
+        for i, p in enumerate(reporte['top_facturadores'][:10], 1):
+            md.item(
+                f"**{p['nombre']}** - ${p['total_vendido']:,.0f}",
+                f"{int(p['cantidad'])} unidades | {_visitas(p)} visitas | Conv: {p['tasa_conversion']:.1f}%",
+                prefijo=f"{i}.",
+            )
+        
+        md.titulo("📦 Top 10 por Volumen (más unidades)")
+        for i, p in enumerate(reporte['bestsellers_volumen'][:10], 1):
+            md.item(
+                f"**{p['nombre']}** - {int(p['cantidad'])} unidades",
+                f"${p['total_vendido']:,.0f} | {_visitas(p)} visitas | Conv: {p['tasa_conversion']:.1f}%",
+                prefijo=f"{i}.",
+            )
@@ -0,0 +1,166 @@
+"""Grabación y reproducción de las respuestas de la API.
+
+Con ``grabacion_modo = "grabar"`` cada respuesta 200 de la API (páginas de
+productos, órdenes, variaciones y reportes de Analytics, y visitas de Post
+Views Counter) se
+guarda tal cual llegó, con su endpoint, parámetros y cabeceras, en un zip
+(``grabacion_archivo``): un miembro comprimido por respuesta y un
+``indice.json`` que se escribe al cerrar. Con ``"reproducir"`` los clientes
+de ``config`` se reemplazan por uno que responde desde ese zip sin abrir
+conexiones, así que la extracción y el análisis se repiten sobre los mismos
+datos en segundos (p. ej. para ajustar umbrales de ``CONFIG``).
+
+Los parámetros de fecha (``after``, ``before``, ``modified_after``)
+cambian en cada ejecución, así que en la clave van como días antes de la
+petición: ``after`` de hace 90 días coincide con el grabado hace 90 días
+aunque la reproducción sea otro día. Lo que no está grabado (p. ej. otro
+``ventas_dias``) responde 404 y la extracción queda marcada como
+incompleta.
+"""
+import atexit
+from datetime import datetime
+import json
+import os
+import threading
+import zipfile
+
+# Parámetros de fecha, relativos a la hora de ejecución
+PARAMETROS_FECHA = ("after", "before", "modified_after")
+INDICE = "indice.json"
+
+
+def _dias_antes(valor, ahora):
+    """``"<n>d"`` con los días (redondeados) entre ``valor`` y ``ahora``."""
+    try:
+        fecha = datetime.fromisoformat(str(valor))
+    except ValueError:
+        return str(valor)
+    if fecha.tzinfo is not None:
+        fecha = fecha.astimezone().replace(tzinfo=None)
+    return f"{round((ahora - fecha).total_seconds() / 86400)}d"
+
+
+def clave(version, endpoint, params, ahora=None):
+    """Identificador de una petición, estable entre ejecuciones."""
+    ahora = ahora or datetime.now()
+    fijos = {
+        k: _dias_antes(v, ahora) if k in PARAMETROS_FECHA else str(v)
+        for k, v in (params or {}).items()
+    }
+    return json.dumps([version, endpoint.strip("/"), fijos], sort_keys=True, ensure_ascii=False)
+
+
+class ArchivoGrabacion:
+    """Zip donde se escriben las respuestas grabadas (compartido entre clientes e hilos)."""
+
+    def __init__(self, ruta):
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self.ruta = ruta
+        self.lock = threading.Lock()
+        self.zip = zipfile.ZipFile(ruta, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6)
+        self.indice = {"grabado": datetime.now().isoformat(), "respuestas": {}}
+        atexit.register(self.cerrar)
+
+    def guardar(self, version, endpoint, params, response):
+        """Agrega una respuesta; la misma petición repetida reemplaza a la anterior en el índice."""
+        with self.lock:
+            if self.zip is None:
+                return
+            nombre = f"respuestas/{len(self.zip.filelist):06d}"
+            self.zip.writestr(nombre, response.content)
+            self.indice["respuestas"][clave(version, endpoint, params)] = {
+                "miembro": nombre,
+                "estado": response.status_code,
+                "cabeceras": {k.lower(): v for k, v in response.headers.items()},
+            }
+
+    def cerrar(self):
+        """Escribe el índice y cierra el zip (también se llama al salir)."""
+        with self.lock:
+            if self.zip is None:
+                return
+            self.zip.writestr(INDICE, json.dumps(self.indice, ensure_ascii=False))
+            self.zip.close()
+            self.zip = None
+        print(f"📼 Respuestas grabadas en {self.ruta} ({len(self.indice['respuestas'])} peticiones)")
+
+
+class ClienteGrabador:
+    """Envuelve un ``ClienteWC`` y graba sus respuestas 200."""
+
+    def __init__(self, cliente, archivo):
+        self.cliente = cliente
+        self.archivo = archivo
+
+    def __getattr__(self, nombre):
+        # configurar, cerrar, url... van al cliente real
+        return getattr(self.cliente, nombre)
+
+    def get(self, endpoint, params=None, **kwargs):
+        response = self.cliente.get(endpoint, params=params, **kwargs)
+        if response.status_code == 200:
+            self.archivo.guardar(self.cliente.version, endpoint, params, response)
+        return response
+
+
+class Cabeceras(dict):
+    """Cabeceras grabadas, con búsqueda sin distinguir mayúsculas."""
+
+    def get(self, nombre, defecto=None):
+        return super().get(nombre.lower(), defecto)
+
+
+class RespuestaGrabada:
+    """Lo que los consumidores usan de ``requests.Response``."""
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = Cabeceras(headers)
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", "replace")
+
+
+NO_GRABADA = RespuestaGrabada(404, {"content-type": "application/json"}, b'{"code":"sin_grabacion"}')
+
+
+class Grabacion:
+    """Zip grabado abierto para lectura."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.lock = threading.Lock()
+        self.zip = zipfile.ZipFile(ruta)
+        indice = json.loads(self.zip.read(INDICE))
+        self.grabado = indice["grabado"]
+        self.respuestas = indice["respuestas"]
+        print(f"📼 Reproduciendo {ruta} (grabado {self.grabado[:16]}, {len(self.respuestas)} peticiones)")
+
+    def responder(self, version, endpoint, params):
+        grabada = self.respuestas.get(clave(version, endpoint, params))
+        if grabada is None:
+            return NO_GRABADA
+        with self.lock:
+            contenido = self.zip.read(grabada["miembro"])
+        return RespuestaGrabada(grabada["estado"], grabada["cabeceras"], contenido)
+
+
+class ClienteReproductor:
+    """Misma interfaz que ``ClienteWC`` pero responde desde una ``Grabacion``."""
+
+    def __init__(self, grabacion, version):
+        self.grabacion = grabacion
+        self.version = version
+
+    def configurar(self, url, consumer_key, consumer_secret):
+        pass
+
+    def get(self, endpoint, params=None, **kwargs):
+        return self.grabacion.responder(self.version, endpoint, params)
+
+    def cerrar(self):
+        pass
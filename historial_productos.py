@@ -0,0 +1,100 @@
+"""Historial diario de visitas, stock y precios por producto.
+
+Post Views Counter solo entrega el contador acumulado de visitas y la API no
+guarda stock ni precios pasados. Cada ejecución deja en ``historial_dir``
+una foto del día (``AAAA-MM-DD.npz``, la primera del día; nunca se
+reescribe) con las columnas ``id``, ``visitas``, ``stock``,
+``precio_actual`` y ``precio_oferta`` en arrays numpy comprimidos, con los
+ids ordenados. Las visitas de un período son la diferencia entre el
+contador actual y el de la foto más cercana al comienzo del período, y el
+stock y el precio de entonces salen de la misma foto; la búsqueda por id es
+un ``searchsorted`` sobre la foto, sin recorrer el historial.
+"""
+from datetime import date
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from config import CONFIG
+
+COLUMNAS = ('visitas', 'stock', 'precio_actual', 'precio_oferta')
+PATRON_FOTO = re.compile(r"^(\d{4}-\d{2}-\d{2})\.npz$")
+
+
+class Historial:
+    """Fotos diarias guardadas en ``directorio`` (por defecto ``CONFIG["historial_dir"]``)."""
+
+    def __init__(self, directorio=None):
+        self.directorio = CONFIG["historial_dir"] if directorio is None else directorio
+        self.cargadas = {}
+
+    def _ruta(self, fecha):
+        return os.path.join(self.directorio, f"{fecha.isoformat()}.npz")
+
+    def fechas(self):
+        """Fechas con foto, de la más vieja a la más reciente."""
+        if not self.directorio or not os.path.isdir(self.directorio):
+            return []
+        encontradas = (PATRON_FOTO.match(nombre) for nombre in os.listdir(self.directorio))
+        return sorted(date.fromisoformat(m.group(1)) for m in encontradas if m)
+
+    def cargar(self, fecha):
+        """Columnas de la foto de ``fecha`` como dict de arrays."""
+        if fecha not in self.cargadas:
+            with np.load(self._ruta(fecha)) as foto:
+                self.cargadas[fecha] = {columna: foto[columna] for columna in foto.files}
+        return self.cargadas[fecha]
+
+    def base(self, dias, hoy=None):
+        """Foto para medir los últimos ``dias``: ``(fecha, días que cubre)``.
+
+        Es la foto anterior a hoy más cercana a ``dias`` atrás, con al menos
+        ``historial_min_dias`` de antigüedad (ante un empate, la más vieja).
+        Devuelve ``(None, 0)`` si no hay ninguna.
+        """
+        hoy = hoy or date.today()
+        candidatas = [
+            fecha for fecha in self.fechas()
+            if (hoy - fecha).days >= max(1, CONFIG["historial_min_dias"])
+        ]
+        if not candidatas:
+            return None, 0
+        fecha = min(candidatas, key=lambda f: (abs((hoy - f).days - dias), f))
+        return fecha, (hoy - fecha).days
+
+    def valores(self, fecha, ids, columna):
+        """``columna`` de la foto de ``fecha`` para cada id de ``ids`` (NaN si no estaba)."""
+        foto = self.cargar(fecha)
+        ids = np.asarray(ids, dtype=np.int64)
+        valores = np.full(len(ids), np.nan)
+        if len(foto['id']) == 0:
+            return valores
+        posicion = np.minimum(np.searchsorted(foto['id'], ids), len(foto['id']) - 1)
+        encontrado = foto['id'][posicion] == ids
+        valores[encontrado] = foto[columna][posicion[encontrado]]
+        return valores
+
+    def registrar(self, analisis, fecha=None):
+        """Guarda la foto del día desde ``analisis``; devuelve la ruta o ``None`` si ya existía."""
+        if not self.directorio:
+            return None
+        fecha = fecha or date.today()
+        ruta = self._ruta(fecha)
+        if os.path.exists(ruta):
+            return None
+        os.makedirs(self.directorio, exist_ok=True)
+
+        orden = np.argsort(analisis['id'].to_numpy(dtype=np.int64), kind='stable')
+        columnas = {'id': analisis['id'].to_numpy(dtype=np.int32)[orden]}
+        columnas['visitas'] = analisis['visitas'].to_numpy(dtype=np.int32)[orden]
+        for columna in ('stock', 'precio_actual', 'precio_oferta'):
+            columnas[columna] = pd.to_numeric(analisis[columna], errors='coerce').to_numpy(dtype=np.float64)[orden]
+
+        temporal = f"{ruta}.tmp"
+        with open(temporal, "wb") as f:
+            np.savez_compressed(f, **columnas)
+        os.replace(temporal, ruta)
+        self.cargadas[fecha] = columnas
+        return ruta
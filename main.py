@@ -1,10 +1,31 @@
 # main.py - Código completo con soporte de visitas
+import argparse
+import re
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-import json
-import time
 
-from config import CONFIG, wcapi
+import almacen_pedidos
+import cache_catalogo
+from columnas_ventas import ColumnasVentas
+from config import CONFIG, configurar_grabacion
+from decodificador import imprimir_resumen_avisos
+from escritor_reportes import generar_markdown
+from historial_productos import Historial
+import metricas
+from paginacion import obtener_ordenes, obtener_paginas, punto_control_ordenes
+import progreso
+from proyecciones import (
+    CAMPOS_PRODUCTOS,
+    COLUMNAS_ANALISIS_PRODUCTOS,
+    COLUMNAS_ANALISIS_VARIACIONES,
+    COLUMNAS_ANALISIS_VENTAS,
+    verificar_columnas,
+)
+from salidas import guardar_salidas
+from variaciones import extraer_variaciones
+from ventas_analytics import extraer_ventas_analytics
+from visitas import completar_visitas
 
 # ============================================
 # CONFIGURACIÓN
@@ -13,88 +34,104 @@ from config import CONFIG, wcapi
 # ============================================
 # FUNCIONES DE EXTRACCIÓN
 # ============================================
-def extraer_productos():
-    """Obtiene todos los productos con sus datos relevantes + visitas"""
-    productos = []
-    page = 1
-    max_reintentos = CONFIG["max_reintentos"]
-    
-    while True:
-        reintentos = 0
-        while reintentos < max_reintentos:
+def _fila_producto(producto):
+    """Convierte un producto de la API en una fila del DataFrame"""
+    # Buscar visitas en meta_data (Post Views Counter)
+    visitas = 0
+    for meta in producto.get('meta_data', []):
+        # Post Views Counter guarda con esta clave
+        if meta['key'] in CONFIG["visitas_meta_keys"]:
             try:
-                print(f"📄 Extrayendo página {page}...", end=" ")
-                response = wcapi.get(
-                    "products",
-                    params={"per_page": CONFIG["per_page"], "page": page},
-                )
-                
-                if response.status_code != 200:
-                    print(f"❌ Error: {response.status_code}")
-                    return pd.DataFrame(productos)
-                
-                # Limpiar warnings de PHP
-                text = response.text
-                json_start = text.find('[')
-                if json_start == -1:
-                    print(f"❌ No JSON")
-                    return pd.DataFrame(productos)
-                
-                clean_json = text[json_start:]
-                data = json.loads(clean_json)
-                
-                if not isinstance(data, list):
-                    print(f"❌ Respuesta inesperada")
-                    return pd.DataFrame(productos)
-                
-                if not data:
-                    print("✅ Fin de productos")
-                    break
-                    
-                for producto in data:
-                    # Buscar visitas en meta_data (Post Views Counter)
-                    visitas = 0
-                    for meta in producto.get('meta_data', []):
-                        # Post Views Counter guarda con esta clave
-                        if meta['key'] in CONFIG["visitas_meta_keys"]:
-                            try:
-                                visitas = int(meta['value'])
-                                break
-                            except:
-                                pass
-                    
-                    productos.append({
-                        'id': producto['id'],
-                        'nombre': producto['name'],
-                        'sku': producto['sku'],
-                        'precio_actual': producto['regular_price'],
-                        'precio_oferta': producto['sale_price'],
-                        'stock': producto['stock_quantity'],
-                        'categorias': [cat['name'] for cat in producto['categories']],
-                        'fecha_creacion': producto['date_created'],
-                        'visitas': visitas
-                    })
-                
-                print(f"✅ {len(data)} productos")
-                page += 1
-                time.sleep(CONFIG["sleep_between_pages"])
+                visitas = int(meta['value'])
                 break
-                
-            except Exception as e:
-                reintentos += 1
-                print(f"⚠️ Intento {reintentos}/{max_reintentos} falló: {str(e)[:50]}...")
-                if reintentos < max_reintentos:
-                    print(f"   Esperando {CONFIG['retry_sleep_seconds']} segundos...")
-                    time.sleep(CONFIG["retry_sleep_seconds"])
-                else:
-                    print(f"❌ Error en página {page}")
-                    return pd.DataFrame(productos)
-        
-        if not data:
-            break
-    
+            except:
+                pass
+
+    return {
+        'id': producto['id'],
+        'nombre': producto['name'],
+        'sku': producto['sku'],
+        'precio_actual': producto['regular_price'],
+        'precio_oferta': producto['sale_price'],
+        'stock': producto['stock_quantity'],
+        'categorias': [cat['name'] for cat in producto['categories']],
+        'fecha_creacion': producto['date_created'],
+        'visitas': visitas,
+        'tipo': producto.get('type'),
+    }
+
+def _con_visitas(df_productos):
+    """Completa las visitas desde Post Views Counter si está habilitado"""
+    if CONFIG["visitas_api"]:
+        df_productos = completar_visitas(df_productos)
+    return df_productos
+
+def _descargar_catalogo():
+    """Descarga el catálogo completo retomando un punto de control previo.
+
+    Devuelve ``(productos, completo)``; el punto de control se borra solo si
+    la descarga llegó a la última página.
+    """
+    punto = progreso.PuntoControl("productos", {}, firma=list(CAMPOS_PRODUCTOS))
+    estado = {}
+    data = obtener_paginas("products", punto.params, etiqueta="productos",
+                           campos=CAMPOS_PRODUCTOS, punto=punto, estado=estado)
+    if estado["completo"]:
+        punto.terminar()
+    # Al retomar, una página puede repetir productos ya guardados
+    return list({producto['id']: producto for producto in data}.values()), estado["completo"]
+
+def extraer_productos(full_refresh=False):
+    """Obtiene todos los productos con sus datos relevantes + visitas"""
+    print(f"📄 Extrayendo productos ({CONFIG['paginas_concurrentes']} páginas en paralelo)...")
+    
+    if not CONFIG["catalogo_cache"]:
+        data, _ = _descargar_catalogo()
+        productos = [_fila_producto(producto) for producto in data]
+        print(f"\n📦 Total productos extraídos: {len(productos)}")
+        return _con_visitas(pd.DataFrame(productos))
+    
+    snapshot = cache_catalogo.cargar()
+    if full_refresh or cache_catalogo.requiere_completa(snapshot) or progreso.pendiente("productos"):
+        print("   Descarga completa del catálogo")
+        data, completo = _descargar_catalogo()
+        filas = [_fila_producto(producto) for producto in data]
+        if data and completo:
+            snapshot = cache_catalogo.nuevo(filas, cache_catalogo.marca_modificacion(data))
+            cache_catalogo.guardar(snapshot)
+        elif data and snapshot is not None:
+            # Descarga parcial: actualiza el snapshot sin reemplazarlo; la
+            # descarga completa se retoma en la próxima ejecución
+            print("⚠️ Descarga completa interrumpida, se actualiza el snapshot anterior con lo descargado")
+            cache_catalogo.fusionar(snapshot, filas, snapshot["modificados_hasta"])
+            cache_catalogo.guardar(snapshot)
+        elif data:
+            print("⚠️ Catálogo incompleto y sin snapshot previo, se analiza lo descargado")
+            print(f"\n📦 Total productos extraídos: {len(filas)}")
+            return _con_visitas(pd.DataFrame(filas))
+        elif snapshot is None:
+            return pd.DataFrame()
+        else:
+            print("⚠️ Descarga completa fallida, se usa el snapshot anterior")
+    else:
+        params = cache_catalogo.parametros_incrementales(snapshot)
+        print(f"   Refresco incremental (modificados desde {params['modified_after']} GMT)")
+        estado = {}
+        data = obtener_paginas("products", params, etiqueta="productos", campos=CAMPOS_PRODUCTOS, estado=estado)
+        # Si faltaron páginas la marca no avanza: la próxima vez se repite el tramo
+        marca = snapshot["modificados_hasta"]
+        if estado["completo"]:
+            marca = cache_catalogo.marca_modificacion(data, marca)
+        cache_catalogo.fusionar(snapshot, [_fila_producto(producto) for producto in data], marca)
+        cache_catalogo.guardar(snapshot)
+        print(f"   {len(data)} productos actualizados")
+    
+    productos = snapshot["productos"]
     print(f"\n📦 Total productos extraídos: {len(productos)}")
-    return pd.DataFrame(productos)
+    if not CONFIG["visitas_api"]:
+        print(f"   ⚠️ Visitas de meta_data desde el snapshot (al {snapshot['ultima_completa'][:10]} "
+              f"para los productos no modificados)")
+    return _con_visitas(pd.DataFrame(productos))
 
 def extraer_ventas(dias=None):
     """Obtiene órdenes de los últimos X días - TODOS los estados que representan ventas"""
@@ -102,93 +139,280 @@ def extraer_ventas(dias=None):
         dias = CONFIG["ventas_dias"]
     fecha_desde = (datetime.now() - timedelta(days=dias)).isoformat()
     
-    # Estados que representan ventas reales
-    estados_validos = CONFIG["estados_validos"]
-    
-    ventas = []
-    
-    for estado in estados_validos:
-        print(f"\n📊 Extrayendo órdenes con estado: {estado}")
-        page = 1
-        max_reintentos = CONFIG["max_reintentos"]
-        
-        while True:
-            reintentos = 0
-            while reintentos < max_reintentos:
-                try:
-                    print(f"   Página {page}...", end=" ")
-                    response = wcapi.get("orders", params={
-                        "per_page": CONFIG["per_page"],
-                        "page": page,
-                        "after": fecha_desde,
-                        "status": estado
-                    })
-                    
-                    if response.status_code != 200:
-                        print(f"❌ Error: {response.status_code}")
-                        break
-                    
-                    # Limpiar warnings de PHP
-                    text = response.text
-                    json_start = text.find('[')
-                    if json_start == -1:
-                        print(f"❌ No JSON")
-                        break
-                    
-                    clean_json = text[json_start:]
-                    data = json.loads(clean_json)
-                    
-                    if not isinstance(data, list) or not data:
-                        print("✅ Fin")
-                        break
-                        
-                    for orden in data:
-                        for item in orden['line_items']:
-                            ventas.append({
-                                'producto_id': item['product_id'],
-                                'nombre': item['name'],
-                                'cantidad': item['quantity'],
-                                'precio_venta': float(item['price']),
-                                'total': float(item['total']),
-                                'fecha': orden['date_created'],
-                                'orden_id': orden['id'],
-                                'estado': orden['status']
-                            })
-                    
-                    print(f"✅ {len(data)} órdenes")
-                    page += 1
-                    time.sleep(CONFIG["sleep_between_pages"])
-                    break
-                    
-                except Exception as e:
-                    reintentos += 1
-                    print(f"⚠️ Error: {str(e)[:30]}")
-                    if reintentos < max_reintentos:
-                        time.sleep(CONFIG["retry_sleep_seconds"])
-                    else:
-                        break
-            
-            if not isinstance(data, list) or not data:
-                break
-    
-    print(f"\n🛒 Total ventas extraídas: {len(ventas)}")
-    return pd.DataFrame(ventas)
+    print(f"\n📊 Extrayendo órdenes ({CONFIG['paginas_concurrentes']} páginas en paralelo)")
+    
+    if CONFIG["pedidos_db"]:
+        # Sincronización incremental contra el almacén local
+        conn = almacen_pedidos.abrir()
+        try:
+            nuevas = almacen_pedidos.sincronizar(conn, fecha_desde)
+            df_ventas = almacen_pedidos.leer_ventas(conn, fecha_desde)
+        finally:
+            conn.close()
+        print(f"\n🛒 Total ventas: {len(df_ventas)} ({nuevas} órdenes sincronizadas)")
+        return df_ventas
+    
+    punto = punto_control_ordenes("ordenes", fecha_desde, dias=dias)
+    estado = {}
+    ordenes = obtener_ordenes(punto.params["fecha_desde"], punto=punto, estado=estado)
+    if estado["completo"]:
+        punto.terminar()
+    # Las líneas van directo a columnas tipadas, sin un dict por línea
+    ventas = ColumnasVentas()
+    ventas.agregar_ordenes(ordenes)
+    
+    print(f"\n🛒 Total ventas extraídas: {len(ventas)} ({len(ordenes)} órdenes)")
+    return ventas.dataframe()
 
 # ============================================
 # FUNCIONES DE ANÁLISIS
 # ============================================
-def analizar_datos(df_productos, df_ventas):
-    """Procesa y cruza datos - incluye volumen, facturación Y visitas"""
+def _bins_por_percentiles(valores, cuantiles):
+    """Bordes de bins monotónicamente crecientes a partir de percentiles de los valores > 0"""
+    percentiles = valores[valores > 0].quantile(cuantiles).to_numpy()
+    
+    # Asegurar que los bins sean monotónicamente crecientes
+    bins = [0]
+    ultima = 0
+    for p in percentiles:
+        if p > ultima:
+            bins.append(p)
+            ultima = p
+    bins.append(float('inf'))
+    return bins
+
+def _categorizar(valores, cuantiles, etiquetas, vacio):
+    """Clasifica por percentiles; si no hay valores positivos, todo queda en ``vacio``"""
+    if valores.max() > 0:
+        bins = _bins_por_percentiles(valores, cuantiles)
+        return pd.cut(valores, bins=bins, labels=etiquetas[:len(bins)-1], duplicates='drop')
+    return pd.Series(
+        pd.Categorical([vacio] * len(valores), categories=etiquetas),
+        index=valores.index,
+    )
+
+def calcular_mascaras(analisis):
+    """Tabla de banderas booleanas que usan las columnas de flags, el resumen y las secciones del reporte"""
+    cantidad = analisis['cantidad']
+    visitas = analisis['visitas_periodo']
+    stock = analisis['stock']
+    conversion = analisis['tasa_conversion']
+    
+    sin_ventas = cantidad == 0
+    sin_visitas = visitas == 0
+    return pd.DataFrame({
+        'sin_ventas': sin_ventas,
+        'con_ventas': cantidad > 0,
+        'con_ingresos': analisis['total_vendido'] > 0,
+        'con_conversion': conversion.notna(),
+        'sin_ventas_stock_alto': sin_ventas & (stock > 5),
+        'sin_visitas': sin_visitas,
+        'sin_visitas_con_stock': sin_visitas & (stock > CONFIG["stock_minimo_sin_visitas"]),
+        'muchas_visitas_sin_ventas': (visitas > CONFIG["visitas_muchas_sin_ventas"]) & sin_ventas,
+        'baja_conversion': (
+            (visitas > CONFIG["visitas_baja_conversion"])
+            & (conversion < CONFIG["conversion_baja_pct"])
+        ),
+        'alta_conversion': (
+            (visitas > CONFIG["visitas_alta_conversion"])
+            & (conversion > CONFIG["conversion_alta_pct"])
+        ),
+        'bestseller_volumen': analisis['categoria_volumen'] == 'Bestseller Volumen',
+        'top_facturador': analisis['categoria_facturacion'] == 'Top Facturador',
+        'oportunidad_precio': (
+            (cantidad > CONFIG["min_ventas_oportunidad_precio"])
+            & (analisis['precio_promedio_venta'] > 0)
+            & (
+                analisis['diferencia_precio'].abs()
+                > analisis['precio_actual'] * CONFIG["umbral_diferencia_precio_pct"]
+            )
+        ),
+    }, index=analisis.index)
+
+FLAGS = [
+    'sin_visitas',
+    'sin_visitas_con_stock',
+    'muchas_visitas_sin_ventas',
+    'baja_conversion',
+    'alta_conversion',
+]
+
+def _resumen_variaciones(df_variaciones):
+    """Precio y stock numéricos por variación, y stock/valor agregados por producto padre"""
+    variaciones = pd.DataFrame({
+        'id': df_variaciones['id'].astype('int64'),
+        'padre_id': df_variaciones['padre_id'].astype('int64'),
+        'precio': pd.to_numeric(df_variaciones['precio_actual'], errors='coerce').fillna(0),
+        'stock': pd.to_numeric(df_variaciones['stock'], errors='coerce'),
+    })
+    variaciones['valor'] = variaciones['precio'] * variaciones['stock']
+    grupos = variaciones.groupby('padre_id', sort=False)
+    # Sin stock propio (gestionado en el padre) la suma queda NaN
+    por_padre = grupos[['stock', 'valor']].sum(min_count=1).join(grupos.agg(
+        precio_medio=('precio', 'mean'),
+        num_variaciones=('id', 'count'),
+    ))
+    # Precio promedio ponderado por stock: así precio * stock es el valor real
+    por_padre['precio'] = (por_padre['valor'] / por_padre['stock'].where(por_padre['stock'] > 0)).fillna(
+        por_padre['precio_medio']
+    )
+    return variaciones.set_index('id')['precio'], por_padre
+
+def _edad_dias(fechas, ahora=None):
+    """Antigüedad en días (fraccionarios) de cada fecha; NaN si no se puede leer"""
+    if ahora is None:
+        ahora = pd.Timestamp.now()
+    fechas = pd.to_datetime(fechas, errors='coerce', format='ISO8601')
+    return (ahora - fechas) / pd.Timedelta(days=1)
+
+def _ventas_por_ventana(df_ventas, edad, ventanas):
+    """Cantidad y total acumulados por producto para cada ventana, con un solo groupby
+    
+    Cada línea cae en la cubeta de la ventana más corta que la contiene; la
+    suma acumulada sobre las cubetas da el total de cada ventana. Devuelve
+    ``{dias: (cantidad, total)}`` con series indexadas por ``producto_id``.
+    """
+    limites = np.asarray(ventanas, dtype='float64')
+    cubeta = np.searchsorted(limites, edad.to_numpy(dtype='float64'), side='right')
+    dentro = cubeta < len(limites)  # NaN y líneas más viejas quedan fuera
+    columnas = pd.MultiIndex.from_product([['cantidad', 'total'], range(len(limites))])
+    por_cubeta = (
+        df_ventas.loc[dentro, ['producto_id', 'cantidad', 'total']]
+        .assign(cubeta=cubeta[dentro])
+        .groupby(['producto_id', 'cubeta'])[['cantidad', 'total']].sum()
+        .unstack('cubeta', fill_value=0)
+        .reindex(columns=columnas, fill_value=0)
+    )
+    cantidad = por_cubeta['cantidad'].cumsum(axis=1)
+    total = por_cubeta['total'].cumsum(axis=1)
+    return {dias: (cantidad[i], total[i]) for i, dias in enumerate(ventanas)}
+
+def _visitas_periodo(historial, analisis, visitas, dias):
+    """Visitas de los últimos ``dias`` según el historial; ``(None, None, 0)`` sin foto
+    
+    Devuelve ``(visitas, fecha de la foto, días que cubre)``. Si la foto no
+    está justo a ``dias`` atrás, la diferencia se lleva a ``dias`` a la
+    misma tasa diaria, siempre que cubra al menos ``historial_cobertura_min``
+    del período (si no, se trata como sin foto: una semana de visitas no
+    decide un trimestre). Un producto que no estaba en la foto no tiene base:
+    su contador se reparte según su antigüedad (``fecha_creacion``) si es
+    más viejo que ``dias``, o cuenta entero. Un contador que bajó (reinicio)
+    cuenta 0, y nunca se supera el contador acumulado.
+    """
+    fecha, cubiertos = historial.base(dias) if historial is not None else (None, 0)
+    if fecha is None or cubiertos < dias * CONFIG["historial_cobertura_min"]:
+        return None, None, 0
+    antes = pd.Series(historial.valores(fecha, analisis['id'], 'visitas'), index=analisis.index)
+    periodo = (visitas - antes).clip(lower=0) * (dias / cubiertos)
+    sin_base = antes.isna()
+    if sin_base.any():
+        edad = _edad_dias(analisis.loc[sin_base, 'fecha_creacion'])
+        proporcion = (dias / pd.Series(edad, index=analisis.index[sin_base]).where(lambda e: e > dias)).fillna(1)
+        periodo[sin_base] = visitas[sin_base] * proporcion
+    return periodo.clip(upper=visitas).round().astype('int32'), fecha, cubiertos
+
+def _ventas_agregadas_por_ventana(df_ventas, ventanas):
+    """Como ``_ventas_por_ventana`` pero desde un ``df_ventas`` ya agregado por ventana (columna ``dias``)"""
+    por_ventana = {}
+    for dias in ventanas:
+        sumas = df_ventas[df_ventas['dias'] == dias].groupby('producto_id')[['cantidad', 'total']].sum()
+        por_ventana[dias] = (sumas['cantidad'], sumas['total'])
+    return por_ventana
+
+def _metricas_ventana(analisis, dias, cantidad, total, historial=None):
+    """Agrega a ``analisis`` las columnas ``*_<dias>d`` de una ventana"""
+    sufijo = f"_{dias}d"
+    cantidad = analisis['id'].map(cantidad).fillna(0).astype('int32')
+    total_vendido = analisis['id'].map(total).fillna(0).astype('float64')
+    visitas, _, _ = _visitas_periodo(historial, analisis, analisis['visitas'], dias)
+    if visitas is None:
+        # Sin historial se estiman a la tasa diaria del período principal
+        visitas = analisis['visitas_dia'] * dias
+    escala = dias / CONFIG["ventas_dias"]
+    
+    analisis['cantidad' + sufijo] = cantidad
+    analisis['total_vendido' + sufijo] = total_vendido
+    analisis['rotacion_dias' + sufijo] = cantidad / dias
+    analisis['facturacion_dia' + sufijo] = total_vendido / dias
+    analisis['tasa_conversion' + sufijo] = cantidad / visitas.where(visitas > 0) * 100
+    analisis['categoria_volumen' + sufijo] = pd.cut(
+        cantidad,
+        bins=[-0.1, 0, 1 * escala, 10 * escala, 50 * escala, float('inf')],
+        labels=['Sin ventas', 'Muy baja', 'Venta baja', 'Venta media', 'Bestseller Volumen']
+    )
+    analisis['categoria_facturacion' + sufijo] = _categorizar(
+        total_vendido,
+        [0.25, 0.5, 0.75],
+        ['Sin ingresos', 'Facturación baja', 'Facturación media', 'Facturación alta', 'Top Facturador'],
+        'Sin ingresos',
+    )
+
+def analizar_datos(df_productos, df_ventas, df_variaciones=None, ventanas=None, historial=None):
+    """Procesa y cruza datos - incluye volumen, facturación Y visitas
+    
+    Con ``df_variaciones`` los productos variables toman stock y precio de
+    sus variaciones, y cada línea vendida se compara contra el precio de la
+    variación que se vendió (``variacion_id``) en lugar del precio del padre.
+    
+    ``ventanas`` (por defecto ``CONFIG["ventanas_dias"]``) agrega columnas
+    ``*_<dias>d`` por ventana a partir de las mismas ventas; ``df_ventas``
+    debe cubrir la más larga. Las columnas sin sufijo son de ``ventas_dias``.
+    ``df_ventas`` también puede venir agregado por producto, variación y
+    ventana (``ventas_analytics``, con las columnas ``num_ordenes`` y
+    ``dias``) en lugar de una fila por línea de venta.
+    
+    Con ``historial`` (``historial_productos.Historial``) la conversión y
+    los flags de visitas usan las visitas del período (``visitas_periodo``)
+    en vez del contador acumulado, y se agregan ``cambio_stock`` y
+    ``cambio_precio_pct`` respecto de la foto del comienzo del período. Sin
+    foto suficiente ``visitas_periodo`` es el contador acumulado.
+    """
+    verificar_columnas(df_productos, COLUMNAS_ANALISIS_PRODUCTOS, "productos")
+    if 'dias' not in df_ventas and not df_ventas.empty:
+        verificar_columnas(df_ventas, COLUMNAS_ANALISIS_VENTAS, "ventas")
+    if df_variaciones is not None and not df_variaciones.empty:
+        verificar_columnas(df_variaciones, COLUMNAS_ANALISIS_VARIACIONES, "variaciones")
+    if ventanas is None:
+        ventanas = CONFIG["ventanas_dias"]
+    ventanas = sorted(set(ventanas))
+    periodo_dias = CONFIG["ventas_dias"]
+    por_ventana = {}
+    if 'dias' in df_ventas:
+        # Ventas ya agregadas por ventana en el servidor (ventas_analytics)
+        por_ventana = _ventas_agregadas_por_ventana(df_ventas, ventanas)
+        df_ventas = df_ventas[df_ventas['dias'] == periodo_dias]
+    elif not df_ventas.empty and ventanas:
+        edad = _edad_dias(df_ventas['fecha'])
+        por_ventana = _ventas_por_ventana(df_ventas, edad, ventanas)
+        if ventanas[-1] > periodo_dias:
+            # La extracción cubre más que el período principal
+            df_ventas = df_ventas[(edad < periodo_dias).to_numpy()]
+    
+    precio_producto = pd.Series(
+        pd.to_numeric(df_productos['precio_actual'], errors='coerce').fillna(0).to_numpy(dtype='float64'),
+        index=df_productos['id'],
+    )
+    if df_variaciones is not None and not df_variaciones.empty:
+        precio_variacion, por_padre = _resumen_variaciones(df_variaciones)
+        precio_producto.update(por_padre['precio'])
+    else:
+        precio_variacion, por_padre = pd.Series(dtype='float64'), None
     
-    # Ventas por producto
+    # Ventas por producto; "lista" es lo que habrían costado a precio de lista
     if not df_ventas.empty:
-        ventas_por_producto = df_ventas.groupby('producto_id').agg({
-            'cantidad': 'sum',
-            'total': 'sum',
-            'orden_id': 'count'
-        }).rename(columns={'orden_id': 'num_ordenes'})
+        precio_lista = df_ventas['producto_id'].map(precio_producto)
+        if 'variacion_id' in df_ventas and not precio_variacion.empty:
+            precio_lista = df_ventas['variacion_id'].map(precio_variacion).fillna(precio_lista)
+        ventas_por_producto = df_ventas.assign(
+            lista=precio_lista * df_ventas['cantidad']
+        ).groupby('producto_id', sort=False).agg(
+            cantidad=('cantidad', 'sum'),
+            total=('total', 'sum'),
+            num_ordenes=('num_ordenes', 'sum') if 'num_ordenes' in df_ventas else ('orden_id', 'count'),
+            lista=('lista', 'sum'),
+        )
     else:
-        ventas_por_producto = pd.DataFrame(columns=['cantidad', 'total', 'num_ordenes'])
+        ventas_por_producto = pd.DataFrame(columns=['cantidad', 'total', 'num_ordenes', 'lista'])
     
     # Merge con productos
     analisis = df_productos.merge(
@@ -198,307 +422,289 @@ def analizar_datos(df_productos, df_ventas):
         how='left'
     )
     
-    # Calcular métricas básicas
-    analisis['cantidad'] = analisis['cantidad'].fillna(0)
-    analisis['total_vendido'] = analisis['total'].fillna(0)
-    analisis['num_ordenes'] = analisis['num_ordenes'].fillna(0)
-    analisis['visitas'] = analisis['visitas'].fillna(0)
+    # Calcular métricas básicas (tipos compactos: enteros en int32,
+    # montos en float64 para no perder precisión en las sumas)
+    cantidad = analisis['cantidad'].fillna(0).astype('int32')
+    total_vendido = analisis['total'].fillna(0).astype('float64')
+    visitas = analisis['visitas'].fillna(0).astype('int32')
+    analisis['id'] = analisis['id'].astype('int32')
+    analisis['cantidad'] = cantidad
+    analisis['total_vendido'] = total_vendido
+    analisis['num_ordenes'] = analisis['num_ordenes'].fillna(0).astype('int32')
+    analisis['visitas'] = visitas
+    
+    # Visitas del período a partir del historial diario (o el acumulado si no hay)
+    visitas_periodo, fecha_base, cubiertos = _visitas_periodo(historial, analisis, visitas, periodo_dias)
+    if visitas_periodo is None:
+        visitas_periodo = visitas
+    else:
+        print(f"   📚 Visitas del período desde la foto del {fecha_base} ({cubiertos} días)")
+    analisis['visitas_periodo'] = visitas_periodo
+    analisis.attrs['historial'] = {'fecha_base': fecha_base.isoformat(), 'dias': cubiertos} if fecha_base else None
     
-    analisis['precio_promedio_venta'] = (
-        analisis['total_vendido'] / analisis['cantidad']
-    ).fillna(0)
+    con_ventas = cantidad > 0
+    analisis['precio_promedio_venta'] = (total_vendido / cantidad.where(con_ventas)).fillna(0)
     
-    periodo_dias = CONFIG["ventas_dias"]
-    analisis['rotacion_dias'] = analisis['cantidad'] / periodo_dias  # ventas por día
-    analisis['facturacion_dia'] = analisis['total_vendido'] / periodo_dias  # $ por día
-    analisis['visitas_dia'] = analisis['visitas'] / periodo_dias  # visitas por día
+    analisis['rotacion_dias'] = cantidad / periodo_dias  # ventas por día
+    analisis['facturacion_dia'] = total_vendido / periodo_dias  # $ por día
+    analisis['visitas_dia'] = visitas_periodo / periodo_dias  # visitas por día
     
     # Convertir precio_actual a numérico
-    analisis['precio_actual'] = pd.to_numeric(analisis['precio_actual'], errors='coerce').fillna(0)
-    analisis['stock'] = pd.to_numeric(analisis['stock'], errors='coerce').fillna(0)
+    precio_actual = pd.to_numeric(analisis['precio_actual'], errors='coerce').fillna(0).astype('float64')
+    stock = pd.to_numeric(analisis['stock'], errors='coerce').fillna(0).astype('float64')
+    
+    # Productos variables: stock total y precio ponderado de sus variaciones
+    num_variaciones = pd.Series(0, index=analisis.index)
+    if por_padre is not None:
+        ids_padre = analisis.loc[analisis['id'].isin(por_padre.index), 'id']
+        stock_variaciones = ids_padre.map(por_padre['stock']).dropna()
+        stock.loc[stock_variaciones.index] = stock_variaciones
+        precio_actual.loc[ids_padre.index] = ids_padre.map(por_padre['precio'])
+        num_variaciones.loc[ids_padre.index] = ids_padre.map(por_padre['num_variaciones'])
+    analisis['precio_actual'] = precio_actual
+    analisis['stock'] = stock.astype('int32')
+    analisis['num_variaciones'] = num_variaciones.astype('int32')
+    stock = analisis['stock']
+    
+    # Stock y precio al comienzo del período (NaN sin foto o producto nuevo)
+    if fecha_base is not None:
+        stock_antes = historial.valores(fecha_base, analisis['id'], 'stock')
+        precio_antes = pd.Series(historial.valores(fecha_base, analisis['id'], 'precio_actual'), index=analisis.index)
+        analisis['cambio_stock'] = stock - stock_antes
+        analisis['cambio_precio_pct'] = (precio_actual - precio_antes) / precio_antes.where(precio_antes > 0) * 100
+    else:
+        analisis['cambio_stock'] = np.nan
+        analisis['cambio_precio_pct'] = np.nan
     
-    # Métricas de conversión
-    analisis['tasa_conversion'] = (
-        (analisis['cantidad'] / analisis['visitas'].replace(0, 1)) * 100
-    ).fillna(0)
+    # Precio de lista promedio de lo vendido (por variación cuando corresponde)
+    precio_referencia = (analisis.pop('lista').astype('float64') / cantidad.where(con_ventas)).fillna(precio_actual)
     
-    # Donde no hay visitas, poner NaN en vez de 0 para distinguir
-    analisis.loc[analisis['visitas'] == 0, 'tasa_conversion'] = float('nan')
+    # Métricas de conversión (NaN donde no hay visitas, para distinguir de 0)
+    analisis['tasa_conversion'] = cantidad / visitas_periodo.where(visitas_periodo > 0) * 100
     
     # Calcular margen de beneficio
-    analisis['diferencia_precio'] = analisis['precio_promedio_venta'] - analisis['precio_actual']
-    analisis['margen_porcentaje'] = (
-        (analisis['diferencia_precio'] / analisis['precio_actual'].replace(0, 1)) * 100
-    ).fillna(0)
+    diferencia_precio = analisis['precio_promedio_venta'] - precio_referencia
+    analisis['diferencia_precio'] = diferencia_precio
+    analisis['margen_porcentaje'] = (diferencia_precio / precio_referencia.replace(0, 1) * 100).fillna(0)
     
     # Clasificar por VOLUMEN
     analisis['categoria_volumen'] = pd.cut(
-        analisis['cantidad'], 
+        cantidad, 
         bins=[-0.1, 0, 1, 10, 50, float('inf')],
         labels=['Sin ventas', 'Muy baja', 'Venta baja', 'Venta media', 'Bestseller Volumen']
     )
     
     # Clasificar por FACTURACIÓN (corregido para evitar bins iguales)
-    if analisis['total_vendido'].max() > 0:
-        percentiles = analisis[analisis['total_vendido'] > 0]['total_vendido'].quantile([0.25, 0.5, 0.75]).values
-        
-        # Asegurar que los bins sean monotónicamente crecientes
-        bins_fact = [0]
-        ultima = 0
-        for p in percentiles:
-            if p > ultima:
-                bins_fact.append(p)
-                ultima = p
-        bins_fact.append(float('inf'))
-        
-        # Crear etiquetas según cantidad de bins
-        labels_fact = ['Sin ingresos', 'Facturación baja', 'Facturación media', 'Facturación alta', 'Top Facturador']
-        labels_fact = labels_fact[:len(bins_fact)-1]
-        
-        analisis['categoria_facturacion'] = pd.cut(
-            analisis['total_vendido'],
-            bins=bins_fact,
-            labels=labels_fact,
-            duplicates='drop'
-        )
-    else:
-        analisis['categoria_facturacion'] = 'Sin ingresos'
+    analisis['categoria_facturacion'] = _categorizar(
+        total_vendido,
+        [0.25, 0.5, 0.75],
+        ['Sin ingresos', 'Facturación baja', 'Facturación media', 'Facturación alta', 'Top Facturador'],
+        'Sin ingresos',
+    )
     
     # Clasificar por VISITAS
-    if analisis['visitas'].max() > 0:
-        percentiles_vis = analisis[analisis['visitas'] > 0]['visitas'].quantile([0.33, 0.66]).values
-        
-        bins_vis = [0]
-        ultima = 0
-        for p in percentiles_vis:
-            if p > ultima:
-                bins_vis.append(p)
-                ultima = p
-        bins_vis.append(float('inf'))
-        
-        labels_vis = ['Sin visitas', 'Pocas visitas', 'Visitas medias', 'Muchas visitas']
-        labels_vis = labels_vis[:len(bins_vis)-1]
-        
-        analisis['categoria_visitas'] = pd.cut(
-            analisis['visitas'],
-            bins=bins_vis,
-            labels=labels_vis,
-            duplicates='drop'
-        )
-    else:
-        analisis['categoria_visitas'] = 'Sin visitas'
-    
-    # Flags especiales
-    analisis['sin_visitas'] = analisis['visitas'] == 0
-    analisis['sin_visitas_con_stock'] = (
-        (analisis['visitas'] == 0) & (analisis['stock'] > CONFIG["stock_minimo_sin_visitas"])
-    )
-    analisis['muchas_visitas_sin_ventas'] = (
-        (analisis['visitas'] > CONFIG["visitas_muchas_sin_ventas"]) & (analisis['cantidad'] == 0)
-    )
-    analisis['baja_conversion'] = (
-        (analisis['visitas'] > CONFIG["visitas_baja_conversion"])
-        & (analisis['tasa_conversion'] < CONFIG["conversion_baja_pct"])
-    )
-    analisis['alta_conversion'] = (
-        (analisis['visitas'] > CONFIG["visitas_alta_conversion"])
-        & (analisis['tasa_conversion'] > CONFIG["conversion_alta_pct"])
+    analisis['categoria_visitas'] = _categorizar(
+        visitas_periodo,
+        [0.33, 0.66],
+        ['Sin visitas', 'Pocas visitas', 'Visitas medias', 'Muchas visitas'],
+        'Sin visitas',
     )
     
+    # Flags especiales, de una sola tabla de máscaras
+    mascaras = calcular_mascaras(analisis)
+    for flag in FLAGS:
+        analisis[flag] = mascaras[flag]
+    
     # Valor del stock
-    analisis['valor_stock'] = analisis['precio_actual'] * analisis['stock']
+    analisis['valor_stock'] = precio_actual * stock
+    
+    # Mismas métricas por ventana (7/30/... días) sin volver a extraer
+    for dias in ventanas:
+        cantidad_ventana, total_ventana = por_ventana.get(dias, (pd.Series(dtype='int32'), pd.Series(dtype='float64')))
+        _metricas_ventana(analisis, dias, cantidad_ventana, total_ventana, historial)
     
     return analisis
 
-def generar_reporte_para_claude(analisis):
-    """Genera reporte estructurado - incluye volumen, facturación Y visitas"""
+def _top(analisis, mascara, columna, n):
+    """Las ``n`` filas con mayor ``columna`` entre las que cumplen ``mascara`` (sin ordenar todo)"""
+    return analisis.loc[mascara].nlargest(n, columna).to_dict('records')
+
+# Columna de unidades de una ventana (``cantidad_<dias>d``)
+PATRON_VENTANA = re.compile(r"cantidad_(\d+)d")
+
+def _resumen_ventanas(analisis):
+    """Totales de cada ventana presente en ``analisis`` (columnas ``*_<dias>d``)"""
+    resumen = {}
+    ventanas = sorted(int(m.group(1)) for m in map(PATRON_VENTANA.fullmatch, analisis.columns) if m)
+    for dias in ventanas:
+        cantidad = analisis[f'cantidad_{dias}d']
+        resumen[f"{dias}d"] = {
+            "unidades_vendidas": int(cantidad.sum()),
+            "ingreso_total": float(analisis[f'total_vendido_{dias}d'].sum()),
+            "productos_con_ventas": int((cantidad > 0).sum()),
+            "facturacion_dia": float(analisis[f'facturacion_dia_{dias}d'].sum()),
+        }
+    return resumen
+
+def generar_reporte_para_claude(analisis, incluir_detalle=True):
+    """Genera reporte estructurado - incluye volumen, facturación Y visitas
+    
+    Con ``incluir_detalle=False`` se omite ``productos_detalle`` (lo escribe
+    ``salidas.guardar_json`` en streaming).
+    """
+    
+    mascaras = calcular_mascaras(analisis)
+    conteos = mascaras.sum()
+    con_ventas = int(conteos['con_ventas'])
+    ingreso_total = float(analisis['total_vendido'].sum())
     
     reporte = {
         "fecha_analisis": datetime.now().isoformat(),
         "periodo_analizado": f"últimos {CONFIG['ventas_dias']} días",
+        # Foto del historial contra la que se midieron las visitas del período
+        "historial_visitas": analisis.attrs.get('historial'),
+        # Extracciones a las que les faltaron páginas (se retoman en la próxima ejecución)
+        "datos_completos": not progreso.incompletas(),
+        "datos_incompletos": progreso.incompletas(),
         "resumen": {
             "total_productos": int(len(analisis)),
-            "productos_sin_ventas": int(len(analisis[analisis['cantidad'] == 0])),
-            "productos_sin_visitas": int(len(analisis[analisis['visitas'] == 0])),
-            "productos_sin_visitas_con_stock": int(len(analisis[analisis['sin_visitas_con_stock'] == True])),
-            "productos_bestseller_volumen": int(len(analisis[analisis['categoria_volumen'] == 'Bestseller Volumen'])),
-            "productos_top_facturadores": int(len(analisis[analisis['categoria_facturacion'] == 'Top Facturador'])),
-            "ingreso_total": float(analisis['total_vendido'].sum()),
+            "productos_sin_ventas": int(conteos['sin_ventas']),
+            "productos_sin_visitas": int(conteos['sin_visitas']),
+            "productos_sin_visitas_con_stock": int(conteos['sin_visitas_con_stock']),
+            "productos_bestseller_volumen": int(conteos['bestseller_volumen']),
+            "productos_top_facturadores": int(conteos['top_facturador']),
+            "ingreso_total": ingreso_total,
             "unidades_vendidas_total": int(analisis['cantidad'].sum()),
             "visitas_totales": int(analisis['visitas'].sum()),
-            "tasa_conversion_promedio": float(analisis[analisis['tasa_conversion'].notna()]['tasa_conversion'].mean()) if len(analisis[analisis['tasa_conversion'].notna()]) > 0 else 0,
-            "ticket_promedio": float(analisis['total_vendido'].sum() / len(analisis[analisis['cantidad'] > 0])) if len(analisis[analisis['cantidad'] > 0]) > 0 else 0
+            "visitas_periodo": int(analisis['visitas_periodo'].sum()),
+            "tasa_conversion_promedio": float(analisis['tasa_conversion'].mean()) if conteos['con_conversion'] > 0 else 0,
+            "ticket_promedio": ingreso_total / con_ventas if con_ventas > 0 else 0
         },
-        "productos_problematicos": [],
-        "productos_sin_visitas_stock_alto": [],
-        "muchas_visitas_sin_ventas": [],
-        "baja_conversion": [],
-        "alta_conversion": [],
-        "bestsellers_volumen": [],
-        "top_facturadores": [],
-        "oportunidades_precio": [],
-        "productos_detalle": []
+        # Productos sin ventas con stock alto
+        "productos_problematicos": _top(analisis, mascaras['sin_ventas_stock_alto'], 'valor_stock', 30),
+        # Productos sin visitas con stock alto
+        "productos_sin_visitas_stock_alto": _top(analisis, mascaras['sin_visitas_con_stock'], 'valor_stock', 30),
+        # Productos con muchas visitas pero sin ventas
+        "muchas_visitas_sin_ventas": _top(analisis, mascaras['muchas_visitas_sin_ventas'], 'visitas_periodo', 20),
+        # Productos con baja conversión
+        "baja_conversion": _top(analisis, mascaras['baja_conversion'], 'visitas_periodo', 20),
+        # Productos con alta conversión
+        "alta_conversion": _top(analisis, mascaras['alta_conversion'], 'tasa_conversion', 20),
+        # Bestsellers por VOLUMEN
+        "bestsellers_volumen": _top(analisis, mascaras['bestseller_volumen'], 'cantidad', 30),
+        # Top FACTURADORES
+        "top_facturadores": _top(analisis, mascaras['con_ingresos'], 'total_vendido', 30),
+        # Oportunidades de ajuste de precio
+        "oportunidades_precio": _top(analisis, mascaras['oportunidad_precio'], 'cantidad', 20),
+        # Comparación entre ventanas
+        "ventanas": _resumen_ventanas(analisis),
     }
     
-    # Productos sin ventas con stock alto
-    sin_ventas = analisis[
-        (analisis['cantidad'] == 0) & (analisis['stock'] > 5)
-    ].sort_values('valor_stock', ascending=False).head(30).to_dict('records')
-    reporte['productos_problematicos'] = sin_ventas
-    
-    # Productos sin visitas con stock alto
-    sin_visitas_stock = analisis[
-        analisis['sin_visitas_con_stock'] == True
-    ].sort_values('valor_stock', ascending=False).head(30).to_dict('records')
-    reporte['productos_sin_visitas_stock_alto'] = sin_visitas_stock
-    
-    # Productos con muchas visitas pero sin ventas
-    visitas_sin_ventas = analisis[
-        analisis['muchas_visitas_sin_ventas'] == True
-    ].sort_values('visitas', ascending=False).head(20).to_dict('records')
-    reporte['muchas_visitas_sin_ventas'] = visitas_sin_ventas
-    
-    # Productos con baja conversión
-    baja_conv = analisis[
-        analisis['baja_conversion'] == True
-    ].sort_values('visitas', ascending=False).head(20).to_dict('records')
-    reporte['baja_conversion'] = baja_conv
-    
-    # Productos con alta conversión
-    alta_conv = analisis[
-        analisis['alta_conversion'] == True
-    ].sort_values('tasa_conversion', ascending=False).head(20).to_dict('records')
-    reporte['alta_conversion'] = alta_conv
-    
-    # Bestsellers por VOLUMEN
-    bestsellers_vol = analisis[
-        analisis['categoria_volumen'] == 'Bestseller Volumen'
-    ].sort_values('cantidad', ascending=False).head(30).to_dict('records')
-    reporte['bestsellers_volumen'] = bestsellers_vol
-    
-    # Top FACTURADORES
-    top_fact = analisis[
-        analisis['total_vendido'] > 0
-    ].sort_values('total_vendido', ascending=False).head(30).to_dict('records')
-    reporte['top_facturadores'] = top_fact
-    
-    # Oportunidades de ajuste de precio
-    oportunidades = analisis[
-        (analisis['cantidad'] > CONFIG["min_ventas_oportunidad_precio"]) &
-        (analisis['precio_promedio_venta'] > 0) &
-        (
-            analisis['diferencia_precio'].abs()
-            > analisis['precio_actual'] * CONFIG["umbral_diferencia_precio_pct"]
-        )
-    ].sort_values('cantidad', ascending=False).head(20).to_dict('records')
-    reporte['oportunidades_precio'] = oportunidades
-    
     # Todos los productos con métricas
-    reporte['productos_detalle'] = analisis.to_dict('records')
+    if incluir_detalle:
+        reporte['productos_detalle'] = analisis.to_dict('records')
     
     return reporte
 
-def generar_markdown(reporte, timestamp):
-    """Genera reporte en formato Markdown para fácil lectura"""
-    md = f"""# Reporte de Análisis de Precios
-    
-**Fecha:** {reporte['fecha_analisis']}
-**Período:** {reporte['periodo_analizado']}
-
-## 📊 Resumen Ejecutivo
-
-- Total productos: {reporte['resumen']['total_productos']}
-- Sin ventas: {reporte['resumen']['productos_sin_ventas']}
-- Sin visitas: {reporte['resumen']['productos_sin_visitas']}
-- Sin visitas con stock alto: {reporte['resumen']['productos_sin_visitas_con_stock']}
-- Bestsellers por volumen: {reporte['resumen']['productos_bestseller_volumen']}
-- Top facturadores: {reporte['resumen']['productos_top_facturadores']}
-- Ingreso total: ${reporte['resumen']['ingreso_total']:,.2f}
-- Unidades vendidas: {reporte['resumen']['unidades_vendidas_total']:,}
-- Visitas totales: {reporte['resumen']['visitas_totales']:,}
-- Tasa conversión promedio: {reporte['resumen']['tasa_conversion_promedio']:.2f}%
-- Ticket promedio: ${reporte['resumen']['ticket_promedio']:,.2f}
-
-## 🚫 Productos SIN VISITAS con Stock Alto (urgente)
-
-"""
-    for p in reporte['productos_sin_visitas_stock_alto'][:10]:
-        md += f"- **{p['nombre']}** (SKU: {p['sku']})\n"
-        md += f"  - Precio: ${p['precio_actual']} | Stock: {int(p['stock'])} | Valor: ${p.get('valor_stock', 0):,.0f}\n"
-        md += f"  - Visitas: {int(p['visitas'])} | Ventas: {int(p['cantidad'])}\n"
-    
-    md += "\n## 👀 Productos con MUCHAS VISITAS pero SIN VENTAS\n\n"
-    for p in reporte['muchas_visitas_sin_ventas'][:10]:
-        md += f"- **{p['nombre']}** - {int(p['visitas'])} visitas, 0 ventas\n"
-        md += f"  - Precio: ${p['precio_actual']} | Stock: {int(p['stock'])}\n"
-    
-    md += "\n## ⚠️ Productos con BAJA CONVERSIÓN (visitas pero pocas ventas)\n\n"
-    for p in reporte['baja_conversion'][:10]:
-        md += f"- **{p['nombre']}** - Conversión: {p['tasa_conversion']:.2f}%\n"
-        md += f"  - Visitas: {int(p['visitas'])} | Ventas: {int(p['cantidad'])} | Precio: ${p['precio_actual']}\n"
-    
-    md += "\n## ✅ Productos con ALTA CONVERSIÓN (éxitos)\n\n"
-    for p in reporte['alta_conversion'][:10]:
-        md += f"- **{p['nombre']}** - Conversión: {p['tasa_conversion']:.2f}%\n"
-        md += f"  - Visitas: {int(p['visitas'])} | Ventas: {int(p['cantidad'])} | Ingresos: ${p['total_vendido']:,.0f}\n"
-    
-    md += "\n## 💰 Top 10 Facturadores (más ingresos)\n\n"
-    for i, p in enumerate(reporte['top_facturadores'][:10], 1):
-        md += f"{i}. **{p['nombre']}** - ${p['total_vendido']:,.0f}\n"
-        md += f"   - {int(p['cantidad'])} unidades | {int(p['visitas'])} visitas | Conv: {p['tasa_conversion']:.1f}%\n"
-    
-    md += "\n## 📦 Top 10 por Volumen (más unidades)\n\n"
-    for i, p in enumerate(reporte['bestsellers_volumen'][:10], 1):
-        md += f"{i}. **{p['nombre']}** - {int(p['cantidad'])} unidades\n"
-        md += f"   - ${p['total_vendido']:,.0f} | {int(p['visitas'])} visitas | Conv: {p['tasa_conversion']:.1f}%\n"
-    
-    with open(f'reporte_legible_{timestamp}.md', 'w', encoding='utf-8') as f:
-        f.write(md)
-
 # ============================================
 # FUNCIÓN PRINCIPAL
 # ============================================
-def main():
+def preparar_analisis(full_refresh=False, script="main"):
+    """Extrae productos, variaciones y ventas y devuelve el análisis (``None`` sin productos)"""
     print("🔄 Extrayendo productos...")
-    df_productos = extraer_productos()
+    with metricas.fase("extraccion_productos", script) as fase:
+        df_productos = extraer_productos(full_refresh=full_refresh)
+        fase["filas"] = len(df_productos)
     
     if df_productos.empty:
         print("⚠️  No se pudieron extraer productos.")
-        return
+        return None
     
     print(f"\n📊 Productos con visitas: {len(df_productos[df_productos['visitas'] > 0])}")
     print(f"📊 Productos sin visitas: {len(df_productos[df_productos['visitas'] == 0])}")
     
-    print(f"\n📊 Extrayendo ventas ({CONFIG['ventas_dias']} días)...")
-    df_ventas = extraer_ventas(dias=CONFIG["ventas_dias"])
+    df_variaciones = None
+    if CONFIG["variaciones"]:
+        print("\n🧩 Extrayendo variaciones...")
+        with metricas.fase("extraccion_variaciones", script) as fase:
+            df_variaciones = extraer_variaciones(df_productos)
+            fase["filas"] = len(df_variaciones)
+    
+    df_ventas = None
+    if CONFIG["ventas_origen"] == "analytics":
+        # Sumas por producto calculadas por el servidor, una consulta por ventana
+        print("\n📊 Extrayendo ventas agregadas (WooCommerce Analytics)...")
+        with metricas.fase("extraccion_ventas_analytics", script) as fase:
+            df_ventas = extraer_ventas_analytics([CONFIG["ventas_dias"], *CONFIG["ventanas_dias"]])
+            fase["filas"] = 0 if df_ventas is None else len(df_ventas)
+    
+    if df_ventas is None:
+        # Una sola extracción cubre el período principal y todas las ventanas
+        dias = max([CONFIG["ventas_dias"], *CONFIG["ventanas_dias"]])
+        print(f"\n📊 Extrayendo ventas ({dias} días)...")
+        with metricas.fase("extraccion_ventas", script) as fase:
+            df_ventas = extraer_ventas(dias=dias)
+            fase["filas"] = len(df_ventas)
     
     if df_ventas.empty:
         print("⚠️  No hay ventas en el período. Generando reporte solo con productos...")
-        df_ventas = pd.DataFrame(columns=['producto_id', 'cantidad', 'total', 'orden_id', 'estado'])
+        df_ventas = ColumnasVentas().dataframe()
     
+    historial = Historial() if CONFIG["historial_dir"] else None
     print("\n🧮 Analizando datos...")
-    analisis = analizar_datos(df_productos, df_ventas)
-    
-    print("\n📝 Generando reporte...")
-    reporte = generar_reporte_para_claude(analisis)
+    with metricas.fase("analisis", script) as fase:
+        analisis = analizar_datos(df_productos, df_ventas, df_variaciones, historial=historial)
+        fase["filas"] = len(analisis)
     
-    # Guardar en diferentes formatos
+    # Foto del día para los próximos análisis (solo la primera ejecución del día)
+    if historial is not None and not progreso.incompletas() and historial.registrar(analisis):
+        print(f"📚 Foto del día guardada en {CONFIG['historial_dir']}")
+    return analisis
+
+def main(full_refresh=False):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
-    # JSON para Claude/Ollama
-    with open(f'reporte_precios_{timestamp}.json', 'w', encoding='utf-8') as f:
-        json.dump(reporte, f, indent=2, ensure_ascii=False)
+    analisis = preparar_analisis(full_refresh=full_refresh)
+    if analisis is None:
+        metricas.exportar("main", timestamp)
+        return
+    
+    print("\n📝 Generando reporte...")
+    with metricas.fase("reporte"):
+        reporte = generar_reporte_para_claude(analisis, incluir_detalle=False)
     
-    # CSV para Excel
-    analisis.to_csv(f'analisis_productos_{timestamp}.csv', index=False)
+    # Guardar en diferentes formatos
+    # JSON para Claude/Ollama, CSV para Excel y Parquet para otros procesos
+    with metricas.fase("escritura_salidas") as fase:
+        archivos = guardar_salidas(reporte, analisis, timestamp)
+        fase["filas"] = len(analisis)
     
     # Markdown legible
-    generar_markdown(reporte, timestamp)
+    with metricas.fase("escritura_markdown"):
+        generar_markdown(reporte, timestamp)
+    archivos.append(f"reporte_legible_{timestamp}.md")
     
     print(f"\n✅ Reportes generados:")
-    print(f"   - reporte_precios_{timestamp}.json")
-    print(f"   - analisis_productos_{timestamp}.csv")
-    print(f"   - reporte_legible_{timestamp}.md")
+    for archivo in archivos:
+        print(f"   - {archivo}")
+    imprimir_resumen_avisos()
+    metricas.exportar("main", timestamp)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Análisis de precios, ventas y visitas de WooCommerce")
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="ignora el snapshot del catálogo y descarga todos los productos",
+    )
+    modo = parser.add_mutually_exclusive_group()
+    modo.add_argument("--grabar", nargs="?", const="", metavar="ZIP",
+                      help="graba las respuestas de la API (por defecto en grabacion_archivo)")
+    modo.add_argument("--reproducir", nargs="?", const="", metavar="ZIP",
+                      help="responde desde una grabación, sin acceso a la red")
+    args = parser.parse_args()
+    if args.grabar is not None:
+        configurar_grabacion("grabar", args.grabar)
+    elif args.reproducir is not None:
+        configurar_grabacion("reproducir", args.reproducir)
+    main(full_refresh=args.full_refresh)
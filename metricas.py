@@ -0,0 +1,195 @@
+"""Métricas de peticiones HTTP y fases del proceso.
+
+Registra, por endpoint, histogramas de latencia, bytes recibidos, códigos de
+estado y reintentos; además el tiempo dormido por el planificador (límite de
+tasa y backoff) y la duración y filas producidas de cada fase. Las esperas
+se suman entre los hilos del pool (segundos-hilo): con varios hilos
+esperando a la vez pueden superar la duración de la fase. Al final de la
+ejecución se exporta un resumen JSON y un archivo de texto en formato
+Prometheus (apto para el textfile collector de node_exporter).
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import os
+import re
+import threading
+import time
+
+from config import CONFIG
+
+PREFIJO = "wp_prices"
+LIMITES_LATENCIA = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)
+
+_lock = threading.Lock()
+_peticiones = defaultdict(lambda: {
+    "buckets": [0] * len(LIMITES_LATENCIA),
+    "latencia_total": 0.0,
+    "intentos": 0,
+    "bytes": 0,
+    "reintentos": 0,
+    "codigos": defaultdict(int),
+})
+_esperas = defaultdict(float)
+_fases = []
+
+
+def nombre_endpoint(endpoint):
+    """Normaliza el endpoint para usarlo como etiqueta (sin ids numéricos)."""
+    return re.sub(r"/\d+(?=/|$)", "/:id", endpoint.split("?", 1)[0])
+
+
+def registrar_peticion(endpoint, latencia, codigo, bytes_recibidos=0, reintento=False):
+    """Registra un intento de petición HTTP (``codigo`` es ``"error"`` si no hubo respuesta)."""
+    with _lock:
+        datos = _peticiones[nombre_endpoint(endpoint)]
+        for i, limite in enumerate(LIMITES_LATENCIA):
+            if latencia <= limite:
+                datos["buckets"][i] += 1
+        datos["latencia_total"] += latencia
+        datos["intentos"] += 1
+        datos["bytes"] += bytes_recibidos
+        datos["codigos"][str(codigo)] += 1
+        if reintento:
+            datos["reintentos"] += 1
+
+
+def registrar_espera(motivo, segundos):
+    """Acumula tiempo dormido (``"tasa"`` o ``"backoff"``) en segundos-hilo (sumado entre hilos)."""
+    if segundos > 0:
+        with _lock:
+            _esperas[motivo] += segundos
+
+
+@contextmanager
+def fase(nombre, script="main"):
+    """Mide la duración de una fase; asignar ``registro["filas"]`` para informar filas producidas."""
+    registro = {"filas": None}
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        with _lock:
+            _fases.append({
+                "script": script,
+                "fase": nombre,
+                "segundos": time.perf_counter() - inicio,
+                "filas": registro["filas"],
+            })
+
+
+def reiniciar_fases():
+    """Descarta las fases registradas (el servicio las reinicia en cada ciclo)."""
+    with _lock:
+        _fases.clear()
+
+
+def resumen():
+    """Devuelve todas las métricas como diccionario serializable."""
+    with _lock:
+        peticiones = {}
+        for endpoint, datos in _peticiones.items():
+            peticiones[endpoint] = {
+                "intentos": datos["intentos"],
+                "reintentos": datos["reintentos"],
+                "bytes": datos["bytes"],
+                "latencia_total_s": datos["latencia_total"],
+                "latencia_promedio_s": datos["latencia_total"] / datos["intentos"] if datos["intentos"] else 0,
+                "codigos": dict(datos["codigos"]),
+                "histograma_latencia": dict(zip((str(l) for l in LIMITES_LATENCIA), datos["buckets"])),
+            }
+        return {
+            "fecha": datetime.now().isoformat(),
+            "peticiones": peticiones,
+            "esperas_hilo_s": dict(_esperas),
+            "fases": list(_fases),
+        }
+
+
+def _prometheus(datos):
+    """Convierte el resumen al formato de texto de Prometheus."""
+    lineas = [
+        f"# HELP {PREFIJO}_http_request_duration_seconds Latencia de peticiones a WooCommerce",
+        f"# TYPE {PREFIJO}_http_request_duration_seconds histogram",
+    ]
+    for endpoint, p in datos["peticiones"].items():
+        for limite, cantidad in p["histograma_latencia"].items():
+            lineas.append(f'{PREFIJO}_http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{limite}"}} {cantidad}')
+        lineas.append(f'{PREFIJO}_http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {p["intentos"]}')
+        lineas.append(f'{PREFIJO}_http_request_duration_seconds_sum{{endpoint="{endpoint}"}} {p["latencia_total_s"]}')
+        lineas.append(f'{PREFIJO}_http_request_duration_seconds_count{{endpoint="{endpoint}"}} {p["intentos"]}')
+
+    lineas += [
+        f"# HELP {PREFIJO}_http_responses_total Respuestas por código de estado",
+        f"# TYPE {PREFIJO}_http_responses_total counter",
+    ]
+    for endpoint, p in datos["peticiones"].items():
+        for codigo, cantidad in p["codigos"].items():
+            lineas.append(f'{PREFIJO}_http_responses_total{{endpoint="{endpoint}",codigo="{codigo}"}} {cantidad}')
+
+    lineas += [
+        f"# HELP {PREFIJO}_http_response_bytes_total Bytes recibidos",
+        f"# TYPE {PREFIJO}_http_response_bytes_total counter",
+    ]
+    lineas += [f'{PREFIJO}_http_response_bytes_total{{endpoint="{e}"}} {p["bytes"]}' for e, p in datos["peticiones"].items()]
+
+    lineas += [
+        f"# HELP {PREFIJO}_http_retries_total Intentos reintentados",
+        f"# TYPE {PREFIJO}_http_retries_total counter",
+    ]
+    lineas += [f'{PREFIJO}_http_retries_total{{endpoint="{e}"}} {p["reintentos"]}' for e, p in datos["peticiones"].items()]
+
+    lineas += [
+        f"# HELP {PREFIJO}_sleep_thread_seconds_total Tiempo dormido por el planificador, sumado entre hilos",
+        f"# TYPE {PREFIJO}_sleep_thread_seconds_total counter",
+    ]
+    lineas += [f'{PREFIJO}_sleep_thread_seconds_total{{motivo="{m}"}} {s}' for m, s in datos["esperas_hilo_s"].items()]
+
+    lineas += [
+        f"# HELP {PREFIJO}_phase_duration_seconds Duración de cada fase",
+        f"# TYPE {PREFIJO}_phase_duration_seconds gauge",
+    ]
+    lineas += [
+        f'{PREFIJO}_phase_duration_seconds{{script="{f["script"]}",fase="{f["fase"]}"}} {f["segundos"]}'
+        for f in datos["fases"]
+    ]
+    lineas += [
+        f"# HELP {PREFIJO}_phase_rows Filas producidas por cada fase",
+        f"# TYPE {PREFIJO}_phase_rows gauge",
+    ]
+    lineas += [
+        f'{PREFIJO}_phase_rows{{script="{f["script"]}",fase="{f["fase"]}"}} {f["filas"]}'
+        for f in datos["fases"] if f["filas"] is not None
+    ]
+    return "\n".join(lineas) + "\n"
+
+
+def texto_prometheus():
+    """Métricas actuales en formato de texto de Prometheus."""
+    return _prometheus(resumen())
+
+
+def exportar(script, timestamp):
+    """Escribe ``metricas_<script>_<timestamp>.json`` y ``<script>.prom`` en ``CONFIG["metricas_dir"]``."""
+    directorio = CONFIG["metricas_dir"]
+    if not directorio:
+        return None
+    os.makedirs(directorio, exist_ok=True)
+    datos = resumen()
+
+    ruta_json = os.path.join(directorio, f"metricas_{script}_{timestamp}.json")
+    with open(ruta_json, "w", encoding="utf-8") as f:
+        json.dump(datos, f, indent=2, ensure_ascii=False)
+
+    # Nombre fijo y escritura atómica, como espera el textfile collector
+    ruta_prom = os.path.join(directorio, f"{PREFIJO}_{script}.prom")
+    with open(f"{ruta_prom}.tmp", "w", encoding="utf-8") as f:
+        f.write(_prometheus(datos))
+    os.replace(f"{ruta_prom}.tmp", ruta_prom)
+
+    intentos = sum(p["intentos"] for p in datos["peticiones"].values())
+    megas = sum(p["bytes"] for p in datos["peticiones"].values()) / 1e6
+    dormido = sum(datos["esperas_hilo_s"].values())
+    print(f"\n📈 Métricas: {intentos} peticiones, {megas:.1f} MB, {dormido:.1f} s-hilo en esperas → {ruta_json}")
+    return ruta_json
@@ -0,0 +1,194 @@
+"""Análisis de varias tiendas WooCommerce en paralelo, con reporte consolidado.
+
+Lee la lista de tiendas de ``CONFIG["tiendas_archivo"]`` (JSON):
+
+    [
+      {"nombre": "chile", "api_url": "https://...", "consumer_key": "ck_...", "consumer_secret": "cs_..."},
+      {"nombre": "peru", "api_url": "https://...", "consumer_key": "ck_...", "consumer_secret": "cs_...",
+       "ventas_dias": 60}
+    ]
+
+Cada tienda se procesa en su propio proceso (extracción, ``analizar_datos``
+y reportes con el nombre de la tienda en el archivo), así que el tiempo
+total lo marca la tienda más lenta y no la suma. Después se cruzan los
+análisis por SKU en ``analisis_consolidado_<timestamp>.csv`` y
+``reporte_consolidado_<timestamp>.json``.
+"""
+from datetime import datetime
+import json
+import multiprocessing
+import os
+
+import pandas as pd
+
+from config import CONFIG
+
+# Columnas de cada tienda que pasan al consolidado
+COLUMNAS_CONSOLIDADO = ['sku', 'nombre', 'precio_actual', 'stock', 'cantidad', 'total_vendido', 'visitas', 'valor_stock']
+
+
+def cargar_tiendas(ruta=None):
+    """Lee y valida la lista de tiendas."""
+    if ruta is None:
+        ruta = CONFIG["tiendas_archivo"]
+    with open(ruta, encoding="utf-8") as f:
+        tiendas = json.load(f)
+    nombres = set()
+    for tienda in tiendas:
+        faltantes = [c for c in ("nombre", "api_url", "consumer_key", "consumer_secret") if not tienda.get(c)]
+        if faltantes:
+            raise ValueError(f"Tienda sin {', '.join(faltantes)}: {tienda.get('nombre', '?')}")
+        if tienda["nombre"] in nombres:
+            raise ValueError(f"Nombre de tienda repetido: {tienda['nombre']}")
+        nombres.add(tienda["nombre"])
+    return tiendas
+
+
+def analizar_tienda(tienda, timestamp):
+    """Corre extracción, análisis y reportes de una tienda (en un proceso aparte).
+
+    Devuelve ``(nombre, resumen, tabla)``: el resumen del reporte y las
+    columnas de ``COLUMNAS_CONSOLIDADO`` del análisis.
+    """
+    from config import configurar_tienda
+    configurar_tienda(tienda)
+
+    import main
+    import metricas
+    from salidas import guardar_salidas
+
+    nombre = tienda["nombre"]
+    script = f"main_{nombre}"
+    sufijo = f"{nombre}_{timestamp}"
+    print(f"🏬 [{nombre}] Iniciando análisis de {CONFIG['api_url']}")
+    analisis = main.preparar_analisis(script=script)
+    if analisis is None:
+        metricas.exportar(script, timestamp)
+        raise RuntimeError("no se pudieron extraer productos")
+
+    reporte = main.generar_reporte_para_claude(analisis, incluir_detalle=False)
+    guardar_salidas(reporte, analisis, sufijo)
+    main.generar_markdown(reporte, sufijo)
+    metricas.exportar(script, timestamp)
+    print(f"🏬 [{nombre}] ✅ {len(analisis)} productos analizados")
+    resumen = dict(reporte["resumen"], datos_completos=reporte["datos_completos"])
+    return nombre, resumen, analisis[COLUMNAS_CONSOLIDADO].copy()
+
+
+def consolidar(tablas):
+    """Cruza los análisis de las tiendas por SKU.
+
+    ``tablas`` es ``{tienda: DataFrame}``. Devuelve una fila por SKU con las
+    columnas ``<métrica>_<tienda>`` y los totales entre tiendas. Los productos
+    sin SKU no se pueden cruzar y quedan fuera.
+    """
+    largas = []
+    for tienda, tabla in tablas.items():
+        con_sku = tabla[tabla['sku'].fillna('').astype(str).str.strip() != '']
+        # Un SKU repetido dentro de la misma tienda se suma como un solo producto
+        largas.append(
+            con_sku.groupby('sku', sort=False).agg(
+                nombre=('nombre', 'first'),
+                precio_actual=('precio_actual', 'mean'),
+                stock=('stock', 'sum'),
+                cantidad=('cantidad', 'sum'),
+                total_vendido=('total_vendido', 'sum'),
+                visitas=('visitas', 'sum'),
+                valor_stock=('valor_stock', 'sum'),
+            ).assign(tienda=tienda)
+        )
+    if not largas:
+        return pd.DataFrame()
+    larga = pd.concat(largas).reset_index()
+
+    metricas_tienda = ['precio_actual', 'stock', 'cantidad', 'total_vendido', 'visitas']
+    ancha = larga.pivot_table(index='sku', columns='tienda', values=metricas_tienda, aggfunc='first')
+    ancha.columns = [f"{metrica}_{tienda}" for metrica, tienda in ancha.columns]
+
+    precios = larga[larga['precio_actual'] > 0].groupby('sku')['precio_actual']
+    totales = larga.groupby('sku').agg(
+        nombre=('nombre', 'first'),
+        tiendas=('tienda', 'nunique'),
+        stock_total=('stock', 'sum'),
+        cantidad_total=('cantidad', 'sum'),
+        total_vendido_total=('total_vendido', 'sum'),
+        visitas_total=('visitas', 'sum'),
+        valor_stock_total=('valor_stock', 'sum'),
+    )
+    totales['precio_min'] = precios.min()
+    totales['precio_max'] = precios.max()
+    totales['dispersion_precio_pct'] = (
+        (totales['precio_max'] - totales['precio_min']) / totales['precio_min'] * 100
+    ).fillna(0)
+    return totales.join(ancha).reset_index()
+
+
+def generar_reporte_consolidado(resumenes, consolidado, fallidas):
+    """Resumen por tienda y cruces principales entre tiendas."""
+    reporte = {
+        "fecha_analisis": datetime.now().isoformat(),
+        "tiendas": resumenes,
+        "tiendas_fallidas": fallidas,
+        "resumen": {
+            "skus_cruzados": int(len(consolidado)),
+            "skus_en_varias_tiendas": int((consolidado['tiendas'] > 1).sum()) if len(consolidado) else 0,
+            "ingreso_total": float(sum(r["ingreso_total"] for r in resumenes.values())),
+            "unidades_vendidas_total": int(sum(r["unidades_vendidas_total"] for r in resumenes.values())),
+        },
+    }
+    if len(consolidado):
+        varias = consolidado[consolidado['tiendas'] > 1]
+        # Más vendidos sumando todas las tiendas
+        reporte["top_facturadores"] = consolidado.nlargest(30, 'total_vendido_total').to_dict('records')
+        # Mismo SKU con precios muy distintos entre tiendas
+        reporte["dispersion_precios"] = varias.nlargest(20, 'dispersion_precio_pct').to_dict('records')
+        # Stock inmovilizado en la red aunque el producto se venda en otra tienda
+        reporte["stock_sin_rotacion"] = consolidado[
+            (consolidado['cantidad_total'] == 0) & (consolidado['stock_total'] > 0)
+        ].nlargest(30, 'valor_stock_total').to_dict('records')
+    return reporte
+
+
+def main():
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    tiendas = cargar_tiendas()
+    procesos = CONFIG["tiendas_procesos"] or min(len(tiendas), os.cpu_count() or 1)
+    print(f"🏬 Analizando {len(tiendas)} tiendas en {procesos} procesos...")
+
+    resumenes, tablas, fallidas = {}, {}, {}
+    # Un proceso nuevo (spawn) por tienda: config, clientes, planificador y
+    # métricas arrancan de cero y no arrastran la tienda anterior
+    contexto = multiprocessing.get_context("spawn")
+    # (``maxtasksperchild`` de multiprocessing.Pool, disponible en todo Python 3)
+    with contexto.Pool(processes=procesos, maxtasksperchild=1) as pool:
+        pendientes = {
+            tienda["nombre"]: pool.apply_async(analizar_tienda, (tienda, timestamp)) for tienda in tiendas
+        }
+        for nombre, resultado in pendientes.items():
+            try:
+                _, resumen, tabla = resultado.get()
+            except Exception as e:
+                print(f"❌ [{nombre}] falló: {str(e)[:80]}")
+                fallidas[nombre] = str(e)[:200]
+                continue
+            resumenes[nombre] = resumen
+            tablas[nombre] = tabla
+
+    consolidado = consolidar(tablas)
+    reporte = generar_reporte_consolidado(resumenes, consolidado, fallidas)
+
+    ruta_csv = f"analisis_consolidado_{timestamp}.csv"
+    consolidado.to_csv(ruta_csv, index=False)
+    ruta_json = f"reporte_consolidado_{timestamp}.json"
+    with open(ruta_json, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False, default=str)
+
+    print(f"\n✅ Consolidado de {len(resumenes)} tiendas ({len(consolidado)} SKUs):")
+    print(f"   - {ruta_csv}")
+    print(f"   - {ruta_json}")
+    if fallidas:
+        print(f"⚠️  Tiendas con error: {', '.join(fallidas)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,80 +1,40 @@
 """Genera un reporte de pedidos y totaliza productos en un período."""
 from collections import defaultdict
 from datetime import datetime, timedelta
-import json
-import time
+from itertools import chain
 
-from config import CONFIG, wcapi
+from config import CONFIG
+from decodificador import imprimir_resumen_avisos
+from escritor_reportes import EscritorMarkdown
+import metricas
+from paginacion import iterar_ordenes, punto_control_ordenes
+import progreso
 
 
-def obtener_pedidos(dias=None):
-    """Obtiene pedidos en el período y sus productos."""
+def iterar_pedidos(dias=None):
+    """Genera los pedidos del período página a página."""
     if dias is None:
         dias = CONFIG["ventas_dias"]
     fecha_desde = (datetime.now() - timedelta(days=dias)).isoformat()
 
-    pedidos = []
-    estados_validos = CONFIG["estados_validos"]
-
-    for estado in estados_validos:
-        print(f"\n📦 Extrayendo pedidos con estado: {estado}")
-        page = 1
-        max_reintentos = CONFIG["max_reintentos"]
-
-        while True:
-            reintentos = 0
-            while reintentos < max_reintentos:
-                try:
-                    print(f"   Página {page}...", end=" ")
-                    response = wcapi.get(
-                        "orders",
-                        params={
-                            "per_page": CONFIG["per_page"],
-                            "page": page,
-                            "after": fecha_desde,
-                            "status": estado,
-                        },
-                    )
-
-                    if response.status_code != 200:
-                        print(f"❌ Error: {response.status_code}")
-                        break
-
-                    text = response.text
-                    json_start = text.find("[")
-                    if json_start == -1:
-                        print("❌ No JSON")
-                        break
-
-                    clean_json = text[json_start:]
-                    data = json.loads(clean_json)
-
-                    if not isinstance(data, list) or not data:
-                        print("✅ Fin")
-                        break
-
-                    pedidos.extend(data)
-                    print(f"✅ {len(data)} pedidos")
-                    page += 1
-                    time.sleep(CONFIG["sleep_between_pages"])
-                    break
-                except Exception as e:
-                    reintentos += 1
-                    print(f"⚠️ Error: {str(e)[:30]}")
-                    if reintentos < max_reintentos:
-                        time.sleep(CONFIG["retry_sleep_seconds"])
-                    else:
-                        break
-
-            if not isinstance(data, list) or not data:
-                break
+    print("\n📦 Extrayendo pedidos")
+    # Una extracción interrumpida se retoma desde la última página guardada
+    punto = punto_control_ordenes("pedidos", fecha_desde, dias=dias)
+    estado = {}
+    yield from iterar_ordenes(punto.params["fecha_desde"], punto=punto, estado=estado)
+    if estado["completo"]:
+        punto.terminar()
 
+
+def obtener_pedidos(dias=None):
+    """Obtiene pedidos en el período y sus productos."""
+    pedidos = [pedido for pagina in iterar_pedidos(dias) for pedido in pagina]
+    print(f"   {len(pedidos)} pedidos únicos")
     return pedidos
 
 
-def totalizar_productos(pedidos):
-    """Suma cantidades por producto en todas las órdenes."""
-    totales = defaultdict(lambda: {"nombre": "", "cantidad": 0})
+def acumular_totales(totales, pedidos):
+    """Suma a ``totales`` las cantidades por producto de ``pedidos``."""
     for pedido in pedidos:
         for item in pedido.get("line_items", []):
             producto_id = item.get("product_id")
@@ -85,43 +45,88 @@ def totalizar_productos(pedidos):
     return totales
 
 
-def generar_reporte_pedidos(pedidos, totales, timestamp):
-    """Genera un reporte Markdown de pedidos y totales."""
-    md = f"""# Reporte de Pedidos
+def nuevos_totales():
+    """Acumulador vacío de totales por producto."""
+    return defaultdict(lambda: {"nombre": "", "cantidad": 0})
+
+
+def totalizar_productos(pedidos):
+    """Suma cantidades por producto en todas las órdenes."""
+    return acumular_totales(nuevos_totales(), pedidos)
+
+
+def escribir_pedido(md, pedido):
+    """Escribe la sección Markdown de un pedido."""
+    md.escribir(f"### Pedido #{pedido.get('id')} - {pedido.get('date_created')} ({pedido.get('status')})\n\n")
+    for item in pedido.get("line_items", []):
+        md.item(f"{item.get('name')} (ID: {item.get('product_id')}) - Cantidad: {item.get('quantity')}")
+    md.escribir("\n")
+
+
+def generar_reporte_pedidos(paginas, timestamp, dias=None):
+    """Genera un reporte Markdown de pedidos y totales.
+
+    Consume ``paginas`` (iterable de listas de pedidos) de a una: cada pedido
+    se escribe al archivo apenas llega y solo se conservan los totales por
+    producto. ``dias`` es el período del encabezado (por defecto
+    ``ventas_dias``). Devuelve ``(archivo, cantidad de pedidos)``.
+    """
+    if dias is None:
+        dias = CONFIG["ventas_dias"]
+    filename = f"reporte_pedidos_{timestamp}.md"
+    totales = nuevos_totales()
+    num_pedidos = 0
+
+    with EscritorMarkdown(filename) as md:
+        md.escribir(f"""# Reporte de Pedidos
 
 **Fecha:** {datetime.now().isoformat()}
-**Período:** últimos {CONFIG['ventas_dias']} días
+**Período:** últimos {dias} días
 
 ## Pedidos
 
-"""
-    for pedido in pedidos:
-        md += f"### Pedido #{pedido.get('id')} - {pedido.get('date_created')} ({pedido.get('status')})\n\n"
-        for item in pedido.get("line_items", []):
-            md += f"- {item.get('name')} (ID: {item.get('product_id')}) - Cantidad: {item.get('quantity')}\n"
-        md += "\n"
+""")
+        for pedidos in paginas:
+            for pedido in pedidos:
+                escribir_pedido(md, pedido)
+            acumular_totales(totales, pedidos)
+            num_pedidos += len(pedidos)
 
-    md += "## Totalización de productos (suma de todas las órdenes)\n\n"
-    for producto_id, info in sorted(totales.items(), key=lambda x: x[1]["cantidad"], reverse=True):
-        md += f"- {info['nombre']} (ID: {producto_id}) - Total: {info['cantidad']}\n"
+        md.escribir("## Totalización de productos (suma de todas las órdenes)\n\n")
+        for producto_id, info in sorted(totales.items(), key=lambda x: x[1]["cantidad"], reverse=True):
+            md.item(f"{info['nombre']} (ID: {producto_id}) - Total: {info['cantidad']}")
 
-    filename = f"reporte_pedidos_{timestamp}.md"
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write(md)
-    return filename
+        incompletas = progreso.incompletas()
+        if incompletas:
+            md.titulo("⚠️ Datos incompletos")
+            md.escribir("Faltaron páginas en la extracción; los totales no incluyen esos pedidos. "
+                        "La próxima ejecución retoma desde donde quedó.\n\n")
+            for falta in incompletas:
+                md.item(f"{falta['extraccion']} {falta['detalle']}".rstrip())
 
+    return filename, num_pedidos
 
-def main():
-    print(f"🔄 Generando reporte de pedidos ({CONFIG['ventas_dias']} días)...")
-    pedidos = obtener_pedidos()
-    if not pedidos:
+
+def main(dias=None):
+    if dias is None:
+        dias = CONFIG["ventas_dias"]
+    print(f"🔄 Generando reporte de pedidos ({dias} días)...")
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    paginas = iterar_pedidos(dias)
+    with metricas.fase("primera_pagina", script="orders_report"):
+        primera = next(paginas, None)
+    if not primera:
         print("⚠️  No se encontraron pedidos en el período.")
+        metricas.exportar("orders_report", timestamp)
         return
 
-    totales = totalizar_productos(pedidos)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    archivo = generar_reporte_pedidos(pedidos, totales, timestamp)
-    print(f"\n✅ Reporte generado: {archivo}")
+    # Extracción y escritura van intercaladas (streaming), se miden juntas
+    with metricas.fase("extraccion_y_escritura", script="orders_report") as fase:
+        archivo, num_pedidos = generar_reporte_pedidos(chain([primera], paginas), timestamp, dias)
+        fase["filas"] = num_pedidos
+    print(f"\n✅ Reporte generado: {archivo} ({num_pedidos} pedidos)")
+    imprimir_resumen_avisos()
+    metricas.exportar("orders_report", timestamp)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,279 @@
+"""Descarga paginada de endpoints de WooCommerce con concurrencia acotada."""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from config import CONFIG
+from decodificador import decodificar_respuesta
+from planificador import planificador
+import progreso
+from proyecciones import CAMPOS_ORDENES, campos_raiz
+
+
+def obtener_pagina(endpoint, params, page, cliente=None):
+    """Descarga una página con reintentos propios.
+
+    Devuelve ``(data, response)``; ``data`` es ``None`` si la página falló.
+    ``cliente`` es ``config.wcapi`` salvo que se indique otro namespace.
+    """
+    cliente = cliente or config.wcapi
+    data, response = planificador.ejecutar(
+        lambda: cliente.get(endpoint, params={**params, "page": page}),
+        procesar=decodificar_respuesta,
+        etiqueta=f"Página {page}",
+        endpoint=endpoint,
+    )
+    if data is not None and not isinstance(data, list):
+        print(f"   ❌ Página {page}: respuesta inesperada")
+        return None, response
+    return data, response
+
+
+def total_paginas(response):
+    """Lee ``X-WP-TotalPages`` de la respuesta (``None`` si no viene)."""
+    if response is None:
+        return None
+    try:
+        return int(response.headers.get("X-WP-TotalPages"))
+    except (TypeError, ValueError):
+        return None
+
+
+def iterar_paginas(endpoint, params, etiqueta="registros", campos=None, desde_pagina=1, estado=None,
+                   cliente=None):
+    """Genera las páginas de ``endpoint`` en orden, a medida que llegan.
+
+    La primera página se pide sola para leer ``X-WP-Total``/``X-WP-TotalPages``;
+    el resto se reparte entre ``CONFIG["paginas_concurrentes"]`` workers con
+    una ventana acotada, de modo que en memoria nunca hay más páginas que
+    workers. Si el servidor no envía las cabeceras se pagina secuencialmente
+    hasta una página vacía. Si una página falla se detiene la iteración.
+
+    ``campos`` se envía como ``_fields``; si la primera página llega sin
+    alguno de esos campos se repite la descarga sin proyección.
+
+    ``desde_pagina`` retoma una descarga interrumpida. Si se pasa ``estado``
+    (un dict) se actualiza con ``pagina`` (la última entregada) y
+    ``completo`` (``False`` mientras falten páginas o si alguna falló).
+    ``cliente`` se pasa a ``obtener_pagina``.
+    """
+    if estado is None:
+        estado = {}
+    estado.update(pagina=desde_pagina - 1, completo=False)
+    params = {"per_page": CONFIG["per_page"], **params}
+    if campos and CONFIG["proyeccion_campos"]:
+        params["_fields"] = ",".join(campos)
+
+    primera = desde_pagina
+    data, response = obtener_pagina(endpoint, params, primera, cliente)
+    if data and "_fields" in params:
+        faltantes = campos_raiz(campos) - set(data[0])
+        if faltantes:
+            print(f"   ⚠️ La proyección _fields omitió {sorted(faltantes)}, se descarga sin proyección")
+            del params["_fields"]
+            data, response = obtener_pagina(endpoint, params, primera, cliente)
+    if not data:
+        estado["completo"] = data is not None
+        return
+    print(f"   Página {primera}: ✅ {len(data)} {etiqueta}")
+
+    paginas = total_paginas(response)
+    if paginas is None:
+        estado["pagina"] = primera
+        yield data
+        page = primera + 1
+        while True:
+            data, _ = obtener_pagina(endpoint, params, page, cliente)
+            if not data:
+                estado["completo"] = data is not None
+                return
+            print(f"   Página {page}: ✅ {len(data)} {etiqueta}")
+            estado["pagina"] = page
+            yield data
+            page += 1
+
+    total = response.headers.get("X-WP-Total", "?")
+    print(f"   {total} {etiqueta} en {paginas} páginas")
+    estado["pagina"] = primera
+    yield data
+
+    def descargar(page):
+        data, _ = obtener_pagina(endpoint, params, page, cliente)
+        if data is not None:
+            print(f"   Página {page}: ✅ {len(data)} {etiqueta}")
+        return data
+
+    ventana = CONFIG["paginas_concurrentes"]
+    pendientes = deque()
+    siguiente = primera + 1
+    with ThreadPoolExecutor(max_workers=ventana) as pool:
+        try:
+            while pendientes or siguiente <= paginas:
+                while siguiente <= paginas and len(pendientes) < ventana:
+                    pendientes.append(pool.submit(descargar, siguiente))
+                    siguiente += 1
+                # Se consume en orden de página aunque terminen desordenadas
+                data = pendientes.popleft().result()
+                if data is None:
+                    return
+                estado["pagina"] += 1
+                yield data
+            estado["completo"] = True
+        finally:
+            for futuro in pendientes:
+                futuro.cancel()
+
+
+def iterar_paginas_retomables(endpoint, params, etiqueta="registros", campos=None,
+                              punto=None, tramo="todo", estado=None):
+    """``iterar_paginas`` con punto de control opcional.
+
+    Con ``punto`` (un ``progreso.PuntoControl``) primero se entregan, como
+    una sola página, los registros ya guardados de ``tramo``; después se
+    sigue desde la página siguiente a la última registrada, guardando cada
+    página nueva.
+    """
+    if estado is None:
+        estado = {}
+    if punto is None:
+        yield from iterar_paginas(endpoint, params, etiqueta, campos, estado=estado)
+        return
+
+    previos = punto.registros_de(tramo)
+    if previos:
+        yield previos
+    if punto.tramo_completo(tramo):
+        estado["completo"] = True
+        return
+    for data in iterar_paginas(endpoint, params, etiqueta, campos,
+                               desde_pagina=punto.ultima_pagina(tramo) + 1, estado=estado):
+        punto.registrar_pagina(tramo, estado["pagina"], data)
+        yield data
+    if estado["completo"]:
+        punto.completar_tramo(tramo)
+
+
+def obtener_paginas(endpoint, params, etiqueta="registros", campos=None, punto=None, estado=None):
+    """Descarga todas las páginas de ``endpoint`` y devuelve sus registros en orden.
+
+    Si alguna página falla la extracción queda registrada como incompleta
+    en ``progreso`` (y ``estado["completo"]`` en ``False``).
+    """
+    if estado is None:
+        estado = {}
+    registros = []
+    for data in iterar_paginas_retomables(endpoint, params, etiqueta, campos, punto, estado=estado):
+        registros.extend(data)
+    if not estado["completo"]:
+        progreso.registrar_incompleta(etiqueta, f"({endpoint}, después de la página {estado['pagina']})")
+    return registros
+
+
+def deduplicar_ordenes(ordenes):
+    """Deja una sola copia de cada orden por ``id``.
+
+    Si una orden aparece dos veces (p. ej. cambió de estado durante la
+    descarga) se conserva la versión con ``date_modified`` más reciente.
+    """
+    por_id = {}
+    for orden in ordenes:
+        previa = por_id.get(orden['id'])
+        if previa is None or (orden.get('date_modified') or '') >= (previa.get('date_modified') or ''):
+            por_id[orden['id']] = orden
+    return list(por_id.values())
+
+
+def _paginas_ordenes(fecha_desde, estados, punto=None, estado=None):
+    """Genera las páginas crudas de órdenes creadas desde ``fecha_desde``.
+
+    Pide todos los estados en un solo filtro ``status=a,b,c``; si el servidor
+    no lo acepta (ninguna página), cae a una paginación por estado. Con
+    ``punto`` cada cadena de páginas se retoma por separado. Al terminar,
+    ``estado["completo"]`` indica si todas las cadenas llegaron al final.
+    """
+    if estado is None:
+        estado = {}
+    print(f"   Estados: {', '.join(estados)}")
+    combinado = {}
+    hubo_paginas = False
+    for pagina in iterar_paginas_retomables(
+        "orders",
+        {"after": fecha_desde, "status": ",".join(estados)},
+        etiqueta="órdenes",
+        campos=CAMPOS_ORDENES,
+        punto=punto,
+        tramo="combinado",
+        estado=combinado,
+    ):
+        hubo_paginas = True
+        yield pagina
+    estado["completo"] = combinado["completo"]
+    fallidos = [] if combinado["completo"] else ["todos"]
+
+    if not hubo_paginas and len(estados) > 1:
+        print("   ⚠️ Sin resultados con filtro combinado, extrayendo por estado...")
+        fallidos = []
+        for estado_orden in estados:
+            print(f"   Estado: {estado_orden}")
+            parcial = {}
+            yield from iterar_paginas_retomables(
+                "orders",
+                {"after": fecha_desde, "status": estado_orden},
+                etiqueta="órdenes",
+                campos=CAMPOS_ORDENES,
+                punto=punto,
+                tramo=estado_orden,
+                estado=parcial,
+            )
+            if not parcial["completo"]:
+                fallidos.append(estado_orden)
+        estado["completo"] = not fallidos
+
+    if fallidos:
+        progreso.registrar_incompleta("órdenes", f"(estados: {', '.join(fallidos)})")
+
+
+def iterar_ordenes(fecha_desde, estados=None, punto=None, estado=None):
+    """Genera, página a página, las órdenes de todos los estados válidos.
+
+    Las órdenes ya entregadas en una página anterior se omiten, así que cada
+    ``id`` aparece una sola vez (en su primera versión vista).
+    """
+    if estados is None:
+        estados = CONFIG["estados_validos"]
+
+    vistas = set()
+    for pagina in _paginas_ordenes(fecha_desde, estados, punto, estado):
+        ordenes = [orden for orden in pagina if orden['id'] not in vistas]
+        vistas.update(orden['id'] for orden in ordenes)
+        yield ordenes
+
+
+def obtener_ordenes(fecha_desde, estados=None, punto=None, estado=None):
+    """Descarga las órdenes creadas desde ``fecha_desde`` en todos los estados.
+
+    El resultado viene sin órdenes repetidas; si una orden aparece dos veces
+    se conserva la versión modificada más recientemente.
+    """
+    if estados is None:
+        estados = CONFIG["estados_validos"]
+
+    ordenes = []
+    for pagina in _paginas_ordenes(fecha_desde, estados, punto, estado):
+        ordenes.extend(pagina)
+    return deduplicar_ordenes(ordenes)
+
+
+def punto_control_ordenes(clave, fecha_desde, estados=None, dias=None):
+    """Punto de control para la ventana de órdenes desde ``fecha_desde``.
+
+    Si se retoma uno previo, ``punto.params["fecha_desde"]`` es la fecha
+    original de la consulta interrumpida. Con ``dias`` solo se retoma una
+    consulta del mismo largo de ventana.
+    """
+    if estados is None:
+        estados = CONFIG["estados_validos"]
+    firma = {"estados": list(estados), "campos": list(CAMPOS_ORDENES)}
+    if dias is not None:
+        firma["dias"] = dias
+    return progreso.PuntoControl(clave, {"fecha_desde": fecha_desde}, firma=firma)
@@ -0,0 +1,142 @@
+"""Planificador compartido de peticiones: limitación de tasa y reintentos.
+
+Reemplaza las pausas fijas entre páginas y los reintentos planos por:
+
+- un token bucket que limita las peticiones por segundo entre todos los
+  workers y se adapta (baja a la mitad con 429/503, sube de a poco con
+  cada respuesta correcta);
+- backoff exponencial con jitter completo para errores de red y 5xx;
+- respeto de la cabecera ``Retry-After`` cuando el servidor la envía.
+"""
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import random
+import threading
+import time
+
+from config import CONFIG
+import metricas
+
+# Códigos que indican un problema transitorio del servidor
+ESTADOS_REINTENTABLES = {408, 425, 429, 500, 502, 503, 504}
+# Códigos que indican que el servidor está saturado: además de reintentar
+# se baja la tasa
+ESTADOS_SATURACION = {429, 503}
+
+
+def segundos_retry_after(response):
+    """Interpreta ``Retry-After`` (segundos o fecha HTTP); ``None`` si no viene."""
+    valor = response.headers.get("Retry-After")
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        fecha = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return max(0.0, (fecha - datetime.now(timezone.utc)).total_seconds())
+
+
+class Planificador:
+    """Token bucket adaptativo con reintentos y backoff exponencial."""
+
+    def __init__(self, tasa_max=None, tasa_min=None, rafaga=None):
+        self.tasa_max = tasa_max or CONFIG["peticiones_por_segundo"]
+        self.tasa_min = tasa_min or CONFIG["peticiones_por_segundo_min"]
+        self.rafaga = rafaga or CONFIG["rafaga_peticiones"]
+        self.tasa = self.tasa_max
+        self.tokens = float(self.rafaga)
+        self.ultima_recarga = time.monotonic()
+        self.lock = threading.Lock()
+
+    def esperar_turno(self):
+        """Bloquea hasta que haya un token disponible."""
+        if CONFIG["grabacion_modo"] == "reproducir":
+            return  # las respuestas grabadas no cargan al servidor
+        with self.lock:
+            ahora = time.monotonic()
+            self.tokens = min(self.rafaga, self.tokens + (ahora - self.ultima_recarga) * self.tasa)
+            self.ultima_recarga = ahora
+            # Se reserva el token aunque quede en negativo: cada hilo espera
+            # su propio turno sin volver a competir por el lock.
+            self.tokens -= 1
+            espera = -self.tokens / self.tasa if self.tokens < 0 else 0
+        if espera > 0:
+            metricas.registrar_espera("tasa", espera)
+            time.sleep(espera)
+
+    def frenar(self):
+        """Reduce la tasa a la mitad tras una señal de saturación."""
+        with self.lock:
+            self.tasa = max(self.tasa_min, self.tasa / 2)
+            self.tokens = min(self.tokens, 0)
+
+    def acelerar(self):
+        """Recupera tasa gradualmente tras una respuesta correcta."""
+        with self.lock:
+            self.tasa = min(self.tasa_max, self.tasa + self.tasa_max / 20)
+
+    def backoff(self, intento):
+        """Espera con jitter completo para el intento ``intento`` (1, 2, ...)."""
+        tope = min(CONFIG["backoff_max_segundos"], CONFIG["backoff_base_segundos"] * 2 ** (intento - 1))
+        return random.uniform(0, tope)
+
+    def ejecutar(self, peticion, procesar=None, etiqueta="", endpoint="desconocido"):
+        """Ejecuta ``peticion()`` respetando la tasa y reintentando fallos transitorios.
+
+        ``procesar(response)`` se aplica a las respuestas 200; si lanza
+        ``ValueError`` (p. ej. JSON truncado) el intento se reintenta.
+        Devuelve ``(resultado, response)``; ``resultado`` es ``None`` si la
+        petición falló de forma definitiva o se agotaron los reintentos. Cada
+        intento queda registrado en ``metricas`` bajo ``endpoint``.
+        """
+        max_reintentos = CONFIG["max_reintentos"]
+        response = None
+        for intento in range(1, max_reintentos + 1):
+            self.esperar_turno()
+            inicio = time.perf_counter()
+            try:
+                response = peticion()
+            except Exception as e:
+                metricas.registrar_peticion(endpoint, time.perf_counter() - inicio, "error", reintento=intento > 1)
+                motivo = str(e)[:50]
+                espera = self.backoff(intento)
+            else:
+                codigo = response.status_code
+                metricas.registrar_peticion(
+                    endpoint, time.perf_counter() - inicio, codigo, len(response.content), reintento=intento > 1
+                )
+                if codigo in ESTADOS_REINTENTABLES:
+                    if codigo in ESTADOS_SATURACION:
+                        self.frenar()
+                    motivo = f"HTTP {codigo}"
+                    espera = max(segundos_retry_after(response) or 0, self.backoff(intento))
+                elif codigo != 200:
+                    print(f"   ❌ {etiqueta}: error {codigo}")
+                    return None, response
+                else:
+                    try:
+                        resultado = procesar(response) if procesar else response
+                    except ValueError as e:
+                        motivo = str(e)[:50]
+                        espera = self.backoff(intento)
+                    else:
+                        self.acelerar()
+                        return resultado, response
+
+            print(f"   ⚠️ {etiqueta}: intento {intento}/{max_reintentos} falló: {motivo}")
+            if intento < max_reintentos:
+                print(f"   Esperando {espera:.1f} segundos...")
+                metricas.registrar_espera("backoff", espera)
+                time.sleep(espera)
+
+        print(f"   ❌ {etiqueta}: reintentos agotados")
+        return None, response
+
+
+planificador = Planificador()
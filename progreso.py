@@ -0,0 +1,158 @@
+"""Puntos de control de las extracciones paginadas.
+
+Las extracciones largas (catálogo completo, ventana de órdenes) registran su
+avance en un archivo JSONL en ``checkpoint_dir``: la primera línea guarda la
+consulta (parámetros, firma y fecha) y cada línea siguiente una página
+terminada, con su tramo (estado de órdenes o ``todo``), número de página y
+registros. Si la ejecución falla o se interrumpe, la siguiente retoma desde
+la última página registrada con los mismos parámetros en vez de empezar de
+nuevo; al completarse la extracción el archivo se borra.
+
+Además se lleva la lista de extracciones que terminaron incompletas en la
+ejecución actual, para marcarlas en los reportes.
+"""
+from datetime import datetime, timedelta
+import json
+import os
+import threading
+
+from config import CONFIG
+
+_lock = threading.Lock()
+_incompletas = []
+
+
+def registrar_incompleta(extraccion, detalle=""):
+    """Anota que ``extraccion`` quedó incompleta en esta ejecución."""
+    with _lock:
+        _incompletas.append({"extraccion": extraccion, "detalle": detalle})
+    print(f"   ⚠️ Extracción incompleta: {extraccion} {detalle}".rstrip())
+
+
+def incompletas():
+    """Extracciones incompletas registradas desde el último ``reiniciar``."""
+    with _lock:
+        return list(_incompletas)
+
+
+def reiniciar():
+    """Olvida las extracciones incompletas (el servicio lo hace en cada ciclo)."""
+    with _lock:
+        _incompletas.clear()
+
+
+def pendiente(clave):
+    """Indica si hay un punto de control de ``clave`` esperando ser retomado."""
+    directorio = CONFIG["checkpoint_dir"]
+    return bool(directorio) and os.path.exists(os.path.join(directorio, f"{clave}.jsonl"))
+
+
+class PuntoControl:
+    """Avance persistido de una extracción paginada.
+
+    ``params`` son los parámetros de la consulta; si se retoma un punto de
+    control previo se reemplazan por los guardados, para que las páginas
+    sigan siendo de la misma consulta. ``firma`` (p. ej. la proyección o los
+    estados pedidos) debe coincidir para retomar; si no, se empieza de cero.
+    """
+
+    def __init__(self, clave, params, firma=None):
+        self.clave = clave
+        self.params = params
+        self.firma = firma
+        self.paginas = {}
+        self.registros = {}
+        self.completos = set()
+        directorio = CONFIG["checkpoint_dir"]
+        self.ruta = os.path.join(directorio, f"{clave}.jsonl") if directorio else None
+        if self.ruta and not self._cargar():
+            self._iniciar()
+
+    def _iniciar(self):
+        """Crea el archivo con la cabecera de la consulta."""
+        os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+        cabecera = {
+            "clave": self.clave,
+            "firma": self.firma,
+            "params": self.params,
+            "creado": datetime.now().isoformat(),
+        }
+        with open(self.ruta, "w", encoding="utf-8") as f:
+            f.write(json.dumps(cabecera, ensure_ascii=False) + "\n")
+
+    def _cargar(self):
+        """Retoma el archivo existente; devuelve ``False`` si no hay nada utilizable."""
+        if not os.path.exists(self.ruta):
+            return False
+        try:
+            with open(self.ruta, "rb") as f:
+                lineas = f.read().split(b"\n")
+            cabecera = json.loads(lineas[0])
+            vencido = datetime.now() - datetime.fromisoformat(cabecera["creado"]) > timedelta(
+                hours=CONFIG["checkpoint_max_horas"]
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        if cabecera.get("clave") != self.clave or cabecera.get("firma") != self.firma or vencido:
+            print(f"   Punto de control de {self.clave} descartado (otra consulta o vencido)")
+            return False
+
+        # Una ejecución cortada a mitad de escritura deja la última línea
+        # truncada: se lee hasta la última línea válida y se recorta ahí.
+        valido = len(lineas[0]) + 1
+        for numero, linea in enumerate(lineas[1:], start=1):
+            if numero == len(lineas) - 1:
+                # Sin salto de línea final la última línea quedó a medio escribir
+                break
+            try:
+                registro = json.loads(linea)
+            except ValueError:
+                break
+            tramo = registro["tramo"]
+            if registro.get("completo"):
+                self.completos.add(tramo)
+            else:
+                self.paginas[tramo] = registro["pagina"]
+                self.registros.setdefault(tramo, []).extend(registro["filas"])
+            valido += len(linea) + 1
+        with open(self.ruta, "r+b") as f:
+            f.truncate(valido)
+
+        self.params = cabecera["params"]
+        total = sum(len(filas) for filas in self.registros.values())
+        tramos = ", ".join(f"{tramo} hasta la página {pagina}" for tramo, pagina in self.paginas.items())
+        print(f"   ♻️ Retomando {self.clave}: {total} registros ya descargados"
+              + (f" ({tramos})" if tramos else ""))
+        return True
+
+    def _agregar(self, registro):
+        if self.ruta:
+            with open(self.ruta, "a", encoding="utf-8") as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    def ultima_pagina(self, tramo):
+        """Última página registrada de ``tramo`` (0 si ninguna)."""
+        return self.paginas.get(tramo, 0)
+
+    def registros_de(self, tramo):
+        """Registros de ``tramo`` recuperados del archivo al retomar."""
+        return list(self.registros.get(tramo, []))
+
+    def tramo_completo(self, tramo):
+        """Indica si ``tramo`` ya se descargó hasta la última página."""
+        return tramo in self.completos
+
+    def registrar_pagina(self, tramo, pagina, filas):
+        """Guarda una página terminada de ``tramo`` (solo en disco; quien itera ya la tiene)."""
+        self.paginas[tramo] = pagina
+        self._agregar({"tramo": tramo, "pagina": pagina, "filas": filas})
+
+    def completar_tramo(self, tramo):
+        """Marca ``tramo`` como descargado hasta la última página."""
+        self.completos.add(tramo)
+        self._agregar({"tramo": tramo, "completo": True})
+
+    def terminar(self):
+        """Borra el punto de control (la extracción terminó completa)."""
+        if self.ruta and os.path.exists(self.ruta):
+            os.remove(self.ruta)
@@ -0,0 +1,82 @@
+"""Proyección de campos (``_fields``) para las extracciones.
+
+Cada columna que arman ``extraer_productos``, ``extraer_ventas`` y
+``extraer_variaciones`` declara de qué campos de la API sale; la proyección
+que se envía es la unión de esos campos más los que usa la sincronización
+incremental. ``analizar_datos`` verifica al recibir los DataFrames que
+traigan las columnas de ``COLUMNAS_ANALISIS_*``, para que recortar la
+proyección no rompa el análisis en silencio.
+"""
+
+# Columna de df_productos -> campos de /products de los que sale
+ORIGEN_PRODUCTOS = {
+    'id': ('id',),
+    'nombre': ('name',),
+    'sku': ('sku',),
+    'precio_actual': ('regular_price',),
+    'precio_oferta': ('sale_price',),
+    'stock': ('stock_quantity',),
+    'categorias': ('categories.name',),
+    'fecha_creacion': ('date_created',),
+    'visitas': ('meta_data.key', 'meta_data.value'),
+    'tipo': ('type',),
+}
+
+# Columna de df_variaciones -> campos de /products/<id>/variations
+ORIGEN_VARIACIONES = {
+    'id': ('id',),
+    'padre_id': (),  # sale del endpoint, no de la respuesta
+    'sku': ('sku',),
+    'precio_actual': ('regular_price',),
+    'precio_oferta': ('sale_price',),
+    'stock': ('stock_quantity',),
+    'atributos': ('attributes.option',),
+}
+
+# Columna de df_ventas -> campos de /orders de los que sale
+ORIGEN_VENTAS = {
+    'producto_id': ('line_items.product_id',),
+    'nombre': ('line_items.name',),
+    'cantidad': ('line_items.quantity',),
+    'precio_venta': ('line_items.price',),
+    'total': ('line_items.total',),
+    'fecha': ('date_created',),
+    'orden_id': ('id',),
+    'estado': ('status',),
+    'variacion_id': ('line_items.variation_id',),
+}
+
+# Campos que no son columnas pero usan las cachés y el almacén de órdenes
+EXTRA_PRODUCTOS = ('date_modified_gmt',)
+EXTRA_ORDENES = ('date_modified', 'date_modified_gmt')
+
+# Columnas que lee analizar_datos (las verifica al recibir los DataFrames)
+COLUMNAS_ANALISIS_PRODUCTOS = ('id', 'visitas', 'precio_actual', 'stock', 'fecha_creacion')
+COLUMNAS_ANALISIS_VENTAS = ('producto_id', 'cantidad', 'total', 'orden_id', 'variacion_id', 'fecha')
+COLUMNAS_ANALISIS_VARIACIONES = ('id', 'padre_id', 'precio_actual', 'stock')
+
+
+def _campos(origen, extra):
+    """Unión ordenada de los campos de ``origen`` y ``extra``."""
+    campos = []
+    for campo in [c for fuentes in origen.values() for c in fuentes] + list(extra):
+        if campo not in campos:
+            campos.append(campo)
+    return tuple(campos)
+
+
+def verificar_columnas(df, columnas, nombre):
+    """Lanza ``ValueError`` si a ``df`` le falta alguna de ``columnas``."""
+    faltantes = [c for c in columnas if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"df_{nombre} no trae columnas del análisis: {faltantes}")
+
+
+def campos_raiz(campos):
+    """Campos de primer nivel de una proyección (``line_items.name`` -> ``line_items``)."""
+    return {campo.split('.', 1)[0] for campo in campos}
+
+
+CAMPOS_PRODUCTOS = _campos(ORIGEN_PRODUCTOS, EXTRA_PRODUCTOS)
+CAMPOS_ORDENES = _campos(ORIGEN_VENTAS, EXTRA_ORDENES)
+CAMPOS_VARIACIONES = _campos(ORIGEN_VARIACIONES, ())
@@ -0,0 +1,77 @@
+"""Escritura de los archivos de salida del análisis.
+
+- JSON del reporte con la sección ``productos_detalle`` escrita fila a fila
+  por bloques (sin materializar una lista de dicts por producto), con gzip
+  opcional.
+- Tabla completa del análisis en Parquet (requiere ``pyarrow``; se omite
+  si no está instalado).
+- CSV, opcionalmente comprimido.
+"""
+import gzip
+import json
+
+from config import CONFIG
+
+FILAS_POR_BLOQUE = 5000
+
+
+def _abrir_texto(ruta):
+    """Abre ``ruta`` para escritura de texto, con gzip si termina en ``.gz``."""
+    if ruta.endswith(".gz"):
+        return gzip.open(ruta, "wt", encoding="utf-8", compresslevel=6)
+    return open(ruta, "w", encoding="utf-8")
+
+
+def guardar_json(reporte, analisis, ruta):
+    """Escribe ``reporte`` y agrega ``productos_detalle`` en streaming desde ``analisis``.
+
+    Las secciones del reporte se escriben indentadas como antes; cada fila
+    del detalle va en una línea, generada por bloques de ``FILAS_POR_BLOQUE``.
+    """
+    cabecera = {k: v for k, v in reporte.items() if k != "productos_detalle"}
+    texto = json.dumps(cabecera, indent=2, ensure_ascii=False, default=str)
+
+    with _abrir_texto(ruta) as f:
+        # Se reabre el objeto raíz para agregar el detalle como última clave
+        f.write(texto[:texto.rfind("}")].rstrip())
+        f.write(',\n  "productos_detalle": [')
+        primera = True
+        for inicio in range(0, len(analisis), FILAS_POR_BLOQUE):
+            partes = []
+            for fila in analisis.iloc[inicio:inicio + FILAS_POR_BLOQUE].to_dict('records'):
+                partes.append("\n    " if primera else ",\n    ")
+                partes.append(json.dumps(fila, ensure_ascii=False, default=str))
+                primera = False
+            f.write("".join(partes))
+        f.write("\n  ]\n}\n")
+    return ruta
+
+
+def guardar_parquet(analisis, ruta):
+    """Escribe la tabla de análisis en Parquet; devuelve ``None`` si no hay motor instalado."""
+    try:
+        analisis.to_parquet(ruta, index=False)
+    except ImportError:
+        print("⚠️  pyarrow no está instalado, se omite la salida Parquet")
+        return None
+    return ruta
+
+
+def guardar_salidas(reporte, analisis, timestamp):
+    """Escribe JSON, CSV y (si se puede) Parquet; devuelve las rutas generadas."""
+    archivos = []
+
+    sufijo_json = ".json.gz" if CONFIG["salida_json_comprimido"] else ".json"
+    archivos.append(guardar_json(reporte, analisis, f"reporte_precios_{timestamp}{sufijo_json}"))
+
+    sufijo_csv = ".csv.gz" if CONFIG["salida_csv_comprimido"] else ".csv"
+    ruta_csv = f"analisis_productos_{timestamp}{sufijo_csv}"
+    analisis.to_csv(ruta_csv, index=False)
+    archivos.append(ruta_csv)
+
+    if CONFIG["salida_parquet"]:
+        ruta_parquet = guardar_parquet(analisis, f"analisis_productos_{timestamp}.parquet")
+        if ruta_parquet:
+            archivos.append(ruta_parquet)
+
+    return archivos
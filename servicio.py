@@ -0,0 +1,178 @@
+"""Modo servicio: análisis siempre caliente y servido por HTTP local.
+
+Mantiene el proceso vivo (pandas importado, pool de conexiones abierto) y
+repite la extracción cada ``servicio_intervalo_minutos``; como el catálogo,
+las órdenes, las variaciones y las visitas se refrescan de forma
+incremental contra sus cachés, cada ciclo solo descarga lo que cambió. El
+último reporte y el CSV del análisis quedan serializados en memoria y se
+sirven en:
+
+- ``/reporte``: salida de ``generar_reporte_para_claude`` (sin detalle) en JSON.
+- ``/analisis.csv``: tabla completa del análisis.
+- ``/estado``: último refresco, duración, próximo ciclo y último error.
+- ``/metricas``: métricas en formato de texto de Prometheus.
+
+Uso: ``python servicio.py [--host H] [--puerto P] [--intervalo MINUTOS]``
+"""
+import argparse
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+import traceback
+from urllib.parse import urlparse
+
+from config import CONFIG
+from decodificador import imprimir_resumen_avisos
+import main
+import metricas
+import progreso
+
+
+class EstadoServicio:
+    """Último resultado publicado y datos del ciclo de refresco."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reporte = None
+        self.csv = None
+        self.actualizado = None
+        self.duracion = None
+        self.proximo = None
+        self.ciclos = 0
+        self.error = None
+
+    def publicar(self, reporte, csv, duracion):
+        with self.lock:
+            self.reporte = reporte
+            self.csv = csv
+            self.actualizado = datetime.now()
+            self.duracion = duracion
+            self.ciclos += 1
+            self.error = None
+
+    def resumen(self):
+        with self.lock:
+            return {
+                "listo": self.reporte is not None,
+                "actualizado": self.actualizado.isoformat() if self.actualizado else None,
+                "duracion_s": self.duracion,
+                "proximo": self.proximo.isoformat() if self.proximo else None,
+                "ciclos": self.ciclos,
+                "error": self.error,
+            }
+
+
+def refrescar(estado, full_refresh=False):
+    """Ejecuta un ciclo de extracción y análisis y publica el resultado."""
+    inicio = time.perf_counter()
+    metricas.reiniciar_fases()
+    progreso.reiniciar()
+    try:
+        analisis = main.preparar_analisis(full_refresh=full_refresh, script="servicio")
+        if analisis is None:
+            raise RuntimeError("no se pudieron extraer productos")
+        with metricas.fase("reporte", "servicio"):
+            reporte = main.generar_reporte_para_claude(analisis, incluir_detalle=False)
+        with metricas.fase("serializacion", "servicio") as fase:
+            cuerpo_reporte = json.dumps(reporte, ensure_ascii=False, default=str).encode("utf-8")
+            cuerpo_csv = analisis.to_csv(index=False).encode("utf-8")
+            fase["filas"] = len(analisis)
+    except Exception as e:
+        # Se conserva el último reporte publicado
+        traceback.print_exc()
+        with estado.lock:
+            estado.error = f"{datetime.now().isoformat()}: {str(e)[:200]}"
+        print(f"❌ Ciclo fallido, se mantiene el reporte anterior: {str(e)[:80]}")
+        return False
+
+    duracion = time.perf_counter() - inicio
+    estado.publicar(cuerpo_reporte, cuerpo_csv, duracion)
+    imprimir_resumen_avisos()
+    print(f"\n✅ Reporte publicado ({len(analisis)} productos, {duracion:.1f}s)")
+    return True
+
+
+def ciclo_refresco(estado, intervalo_minutos, parada):
+    """Refresca al arrancar y luego cada ``intervalo_minutos`` hasta ``parada``."""
+    while not parada.is_set():
+        refrescar(estado)
+        with estado.lock:
+            estado.proximo = datetime.now() + timedelta(minutes=intervalo_minutos)
+        parada.wait(intervalo_minutos * 60)
+
+
+def crear_manejador(estado):
+    """Crea la clase de manejador HTTP ligada a ``estado``."""
+
+    class Manejador(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def responder(self, codigo, cuerpo, tipo="application/json; charset=UTF-8", cabeceras=None):
+            self.send_response(codigo)
+            for clave, valor in (cabeceras or {}).items():
+                self.send_header(clave, valor)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def do_GET(self):
+            ruta = urlparse(self.path).path.rstrip("/")
+
+            if ruta == "/estado":
+                return self.responder(200, json.dumps(estado.resumen()).encode("utf-8"))
+            if ruta == "/metricas":
+                return self.responder(200, metricas.texto_prometheus().encode("utf-8"),
+                                      "text/plain; version=0.0.4; charset=UTF-8")
+            if ruta not in ("/reporte", "/analisis.csv"):
+                return self.responder(404, b'{"error":"ruta desconocida"}')
+
+            with estado.lock:
+                reporte, csv, actualizado = estado.reporte, estado.csv, estado.actualizado
+            if reporte is None:
+                return self.responder(503, b'{"error":"primer reporte en curso"}', cabeceras={"Retry-After": "30"})
+            cabeceras = {"Last-Modified": actualizado.astimezone().strftime("%a, %d %b %Y %H:%M:%S %z")}
+            if ruta == "/reporte":
+                return self.responder(200, reporte, cabeceras=cabeceras)
+            return self.responder(200, csv, "text/csv; charset=UTF-8", cabeceras)
+
+    return Manejador
+
+
+def servir(host=None, puerto=None, intervalo_minutos=None):
+    """Arranca el ciclo de refresco y el servidor HTTP (bloquea hasta Ctrl+C)."""
+    host = host or CONFIG["servicio_host"]
+    puerto = CONFIG["servicio_puerto"] if puerto is None else puerto
+    intervalo_minutos = intervalo_minutos or CONFIG["servicio_intervalo_minutos"]
+
+    estado = EstadoServicio()
+    parada = threading.Event()
+    hilo = threading.Thread(target=ciclo_refresco, args=(estado, intervalo_minutos, parada), daemon=True)
+    hilo.start()
+
+    servidor = ThreadingHTTPServer((host, puerto), crear_manejador(estado))
+    servidor.daemon_threads = True
+    print(f"🌐 Servicio en http://{host}:{servidor.server_address[1]} "
+          f"(refresco cada {intervalo_minutos} min)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Deteniendo servicio...")
+    finally:
+        parada.set()
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio de análisis de WooCommerce con reporte por HTTP")
+    parser.add_argument("--host", help="interfaz de escucha (por defecto servicio_host)")
+    parser.add_argument("--puerto", type=int, help="puerto (por defecto servicio_puerto)")
+    parser.add_argument("--intervalo", type=float, help="minutos entre refrescos (por defecto servicio_intervalo_minutos)")
+    args = parser.parse_args()
+    servir(args.host, args.puerto, args.intervalo)
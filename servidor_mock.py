@@ -0,0 +1,350 @@
+"""Servidor local que imita los endpoints ``wc/v3`` usados por el proyecto.
+
+Sirve ``products``, ``orders``, ``post-views-counter/get-post-views/<id>`` y
+los reportes ``wc-analytics/reports/products`` y ``reports/variations``
+con un catálogo y pedidos sintéticos de tamaño configurable. Puede inyectar
+avisos de PHP antes del JSON, latencia, respuestas 429 (con ``Retry-After``)
+y errores 5xx, para medir el comportamiento de la extracción sin tocar la
+tienda real.
+
+Uso directo::
+
+    python servidor_mock.py --productos 15000 --ordenes 20000 --puerto 8765
+"""
+import argparse
+from datetime import datetime, timedelta
+import json
+import math
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import random
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+AVISO_PHP = (
+    b"<br />\n<b>Warning</b>:  Undefined array key [\"price\"] in "
+    b"<b>/var/www/html/wp-content/plugins/plugin/plugin.php</b> on line <b>42</b><br />\n"
+)
+
+ESTADOS = ["completed", "processing", "on-hold", "listo-despacho", "listo-retiro", "cancelled", "refunded"]
+# Estados que WooCommerce Analytics no cuenta en los reportes
+ESTADOS_EXCLUIDOS_ANALYTICS = {"cancelled", "refunded"}
+
+
+def generar_catalogo(cantidad, semilla=0):
+    """Genera ``cantidad`` productos con la forma de ``/products``."""
+    rng = random.Random(semilla)
+    base = datetime(2024, 1, 1)
+    productos = []
+    for i in range(1, cantidad + 1):
+        modificado = base + timedelta(minutes=rng.randrange(0, 60 * 24 * 600))
+        productos.append({
+            "id": i,
+            "name": f"Producto sintético {i}",
+            "slug": f"producto-sintetico-{i}",
+            "type": "variable" if i % 10 == 0 else "simple",
+            "status": "publish",
+            "sku": f"SKU-{i:06d}",
+            "price": str(rng.randrange(990, 99990, 10)),
+            "regular_price": str(rng.randrange(990, 99990, 10)),
+            "sale_price": "" if rng.random() < 0.8 else str(rng.randrange(500, 50000, 10)),
+            "stock_quantity": rng.choice([None, 0, 1, 3, 8, 20, 100]),
+            "categories": [{"id": i % 40, "name": f"Categoría {i % 40}", "slug": f"cat-{i % 40}"}],
+            "date_created": (base + timedelta(days=i % 500)).isoformat(),
+            "date_modified": modificado.isoformat(),
+            "date_modified_gmt": modificado.isoformat(),
+            "description": "<p>" + "Descripción larga del producto. " * 20 + "</p>",
+            "short_description": "<p>Descripción corta.</p>",
+            "images": [{"id": i, "src": f"https://example.invalid/img/{i}.jpg", "alt": ""}],
+            "attributes": [],
+            "variations": [i * 1000 + v for v in range(3)] if i % 10 == 0 else [],
+            "meta_data": [
+                {"id": i * 10 + k, "key": f"_meta_{k}", "value": "x" * 40} for k in range(8)
+            ] + [{"id": i * 10 + 9, "key": "_post_views_count", "value": str(rng.randrange(0, 2000))}],
+        })
+    return productos
+
+
+def generar_variaciones(productos, semilla=3):
+    """Genera las variaciones de los productos variables (``{padre_id: [...]}``)."""
+    rng = random.Random(semilla)
+    variaciones = {}
+    for producto in (p for p in productos if p["variations"]):
+        variaciones[producto["id"]] = [
+            {
+                "id": variacion_id,
+                "sku": f"{producto['sku']}-{posicion}",
+                "regular_price": str(rng.randrange(990, 99990, 10)),
+                "sale_price": "",
+                "stock_quantity": rng.choice([None, 0, 2, 5, 15]),
+                "date_modified_gmt": producto["date_modified_gmt"],
+                "attributes": [{"id": 1, "name": "Talla", "option": talla}],
+                "meta_data": [{"id": variacion_id, "key": "_meta", "value": "z" * 40}],
+            }
+            for posicion, (variacion_id, talla) in enumerate(zip(producto["variations"], ("S", "M", "L")))
+        ]
+    return variaciones
+
+
+def generar_ordenes(cantidad, productos, dias=365, semilla=1):
+    """Genera ``cantidad`` órdenes repartidas en los últimos ``dias``."""
+    rng = random.Random(semilla)
+    ahora = datetime.now()
+    ordenes = []
+    for i in range(1, cantidad + 1):
+        creada = ahora - timedelta(minutes=rng.randrange(0, 60 * 24 * dias))
+        modificada = creada + timedelta(minutes=rng.randrange(0, 60 * 24 * 3))
+        items = []
+        for posicion in range(rng.randrange(1, 5)):
+            producto = rng.choice(productos)
+            cantidad_item = rng.randrange(1, 6)
+            precio = float(producto["regular_price"])
+            variacion = rng.choice(producto["variations"]) if producto["variations"] else 0
+            items.append({
+                "id": i * 10 + posicion,
+                "name": producto["name"],
+                "product_id": producto["id"],
+                "variation_id": variacion,
+                "quantity": cantidad_item,
+                "subtotal": f"{precio * cantidad_item:.2f}",
+                "total": f"{precio * cantidad_item:.2f}",
+                "sku": producto["sku"],
+                "price": precio,
+                "meta_data": [],
+            })
+        ordenes.append({
+            "id": i,
+            "status": rng.choice(ESTADOS),
+            "currency": "CLP",
+            "date_created": creada.isoformat(timespec="seconds"),
+            "date_created_gmt": creada.isoformat(timespec="seconds"),
+            "date_modified": modificada.isoformat(timespec="seconds"),
+            "date_modified_gmt": modificada.isoformat(timespec="seconds"),
+            "total": f"{sum(float(item['total']) for item in items):.2f}",
+            "billing": {"first_name": "Nombre", "last_name": "Apellido", "address_1": "Calle 123",
+                        "city": "Santiago", "email": f"cliente{i}@example.invalid", "phone": "+56900000000"},
+            "shipping": {"first_name": "Nombre", "last_name": "Apellido", "address_1": "Calle 123",
+                         "city": "Santiago"},
+            "payment_method": "webpay",
+            "meta_data": [{"id": i, "key": "_meta", "value": "y" * 60}],
+            "line_items": items,
+            "fee_lines": [],
+            "shipping_lines": [{"id": i, "method_title": "Despacho", "total": "3990"}],
+        })
+    # WooCommerce devuelve primero las más recientes
+    ordenes.sort(key=lambda o: o["date_created"], reverse=True)
+    return ordenes
+
+
+class EstadoMock:
+    """Datos y parámetros de inyección de fallas compartidos por el servidor."""
+
+    def __init__(self, productos=1000, ordenes=2000, dias=365, prob_aviso=0.5,
+                 latencia_ms=0, prob_429=0.0, prob_5xx=0.0, semilla=0):
+        self.productos = generar_catalogo(productos, semilla)
+        self.ordenes = generar_ordenes(ordenes, self.productos, dias, semilla + 1)
+        self.variaciones = generar_variaciones(self.productos, semilla + 3)
+        self.prob_aviso = prob_aviso
+        self.latencia_ms = latencia_ms
+        self.prob_429 = prob_429
+        self.prob_5xx = prob_5xx
+        self.rng = random.Random(semilla + 2)
+        self.lock = threading.Lock()
+        self.peticiones = 0
+        self.bytes_enviados = 0
+        self.errores_inyectados = 0
+
+    def sortear(self, probabilidad):
+        """Devuelve True con la probabilidad dada (generador compartido)."""
+        with self.lock:
+            return self.rng.random() < probabilidad
+
+
+def _filtrar(registros, q, es_orden):
+    """Aplica los filtros de la API que usa el proyecto."""
+    if es_orden and q.get("status") and q["status"] != "any":
+        estados = set(q["status"].split(","))
+        registros = [r for r in registros if r["status"] in estados]
+    if q.get("after"):
+        registros = [r for r in registros if r["date_created"] > q["after"]]
+    if q.get("modified_after"):
+        registros = [r for r in registros if r["date_modified_gmt"] > q["modified_after"]]
+    return registros
+
+
+def _reporte_analytics(ordenes, q, por_variacion):
+    """Filas de ``reports/products`` (o ``reports/variations``) en el rango ``after``/``before``."""
+    filas = {}
+    for orden in ordenes:
+        if orden["status"] in ESTADOS_EXCLUIDOS_ANALYTICS:
+            continue
+        if (q.get("after") and orden["date_created"] < q["after"]) or (
+            q.get("before") and orden["date_created"] > q["before"]
+        ):
+            continue
+        for item in orden["line_items"]:
+            if por_variacion and not item["variation_id"]:
+                continue
+            clave = (item["product_id"], item["variation_id"]) if por_variacion else (item["product_id"],)
+            fila = filas.setdefault(clave, {"items_sold": 0, "net_revenue": 0.0, "ordenes": set()})
+            fila["items_sold"] += item["quantity"]
+            fila["net_revenue"] += float(item["total"])
+            fila["ordenes"].add(orden["id"])
+    registros = []
+    for clave, fila in sorted(filas.items()):
+        registro = {"product_id": clave[0]}
+        if por_variacion:
+            registro["variation_id"] = clave[1]
+        registro.update(items_sold=fila["items_sold"], net_revenue=round(fila["net_revenue"], 2),
+                        orders_count=len(fila["ordenes"]))
+        registros.append(registro)
+    return registros
+
+
+def _proyectar(registros, campos):
+    """Aplica ``_fields`` (campos de primer nivel y ``padre.hijo``)."""
+    if not campos:
+        return registros
+    primer_nivel = {}
+    for campo in campos.split(","):
+        padre, _, hijo = campo.partition(".")
+        primer_nivel.setdefault(padre, set())
+        if hijo:
+            primer_nivel[padre].add(hijo)
+
+    def proyectar(valor, hijos):
+        if not hijos:
+            return valor
+        if isinstance(valor, list):
+            return [{k: v for k, v in e.items() if k in hijos} for e in valor]
+        if isinstance(valor, dict):
+            return {k: v for k, v in valor.items() if k in hijos}
+        return valor
+
+    return [
+        {k: proyectar(r[k], primer_nivel[k]) for k in primer_nivel if k in r}
+        for r in registros
+    ]
+
+
+def crear_manejador(estado):
+    """Crea la clase de manejador HTTP ligada a ``estado``."""
+
+    class Manejador(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Cabeceras y cuerpo van en escrituras separadas: sin TCP_NODELAY las
+        # conexiones keep-alive se frenan ~40 ms por respuesta (Nagle + ACK diferido)
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def responder(self, codigo, cuerpo=b"", cabeceras=None):
+            self.send_response(codigo)
+            for clave, valor in (cabeceras or {}).items():
+                self.send_header(clave, valor)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+            with estado.lock:
+                estado.peticiones += 1
+                estado.bytes_enviados += len(cuerpo)
+
+        def do_GET(self):
+            if estado.latencia_ms:
+                time.sleep(estado.latencia_ms / 1000)
+            if estado.sortear(estado.prob_429):
+                with estado.lock:
+                    estado.errores_inyectados += 1
+                return self.responder(429, b'{"code":"too_many_requests"}', {"Retry-After": "1"})
+            if estado.sortear(estado.prob_5xx):
+                with estado.lock:
+                    estado.errores_inyectados += 1
+                return self.responder(estado.rng.choice([500, 502, 503]), b"<html>Error</html>")
+
+            url = urlparse(self.path)
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            ruta = url.path.rstrip("/")
+
+            if "/post-views-counter/get-post-views/" in ruta:
+                producto_id = int(ruta.rsplit("/", 1)[1])
+                return self.responder(200, str((producto_id * 37) % 5000).encode())
+
+            if ruta.endswith("/reports/products") or ruta.endswith("/reports/variations"):
+                registros = _reporte_analytics(estado.ordenes, q, ruta.endswith("/variations"))
+                es_orden = False
+                q = {k: v for k, v in q.items() if k not in ("after", "before")}
+            elif ruta.endswith("/variations"):
+                producto_id = int(ruta.rsplit("/", 2)[1])
+                registros, es_orden = estado.variaciones.get(producto_id, []), False
+            elif ruta.endswith("/products"):
+                registros, es_orden = estado.productos, False
+            elif ruta.endswith("/orders"):
+                registros, es_orden = estado.ordenes, True
+            else:
+                return self.responder(404, b'{"code":"rest_no_route"}')
+
+            registros = _filtrar(registros, q, es_orden)
+            por_pagina = min(int(q.get("per_page", 10)), 100)
+            pagina = int(q.get("page", 1))
+            total = len(registros)
+            pagina_registros = _proyectar(
+                registros[(pagina - 1) * por_pagina:pagina * por_pagina], q.get("_fields")
+            )
+            cuerpo = json.dumps(pagina_registros, ensure_ascii=False).encode()
+            if estado.sortear(estado.prob_aviso):
+                cuerpo = AVISO_PHP + cuerpo
+            return self.responder(200, cuerpo, {
+                "X-WP-Total": str(total),
+                "X-WP-TotalPages": str(max(1, math.ceil(total / por_pagina))),
+            })
+
+    return Manejador
+
+
+def iniciar(estado, puerto=0):
+    """Inicia el servidor en un hilo; devuelve ``(servidor, url_base)``."""
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), crear_manejador(estado))
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}"
+
+
+def agregar_argumentos(parser):
+    """Argumentos de tamaño e inyección de fallas (compartidos con ``benchmark.py``)."""
+    parser.add_argument("--productos", type=int, default=1000)
+    parser.add_argument("--ordenes", type=int, default=2000)
+    parser.add_argument("--dias", type=int, default=365, help="antigüedad máxima de las órdenes")
+    parser.add_argument("--prob-aviso", type=float, default=0.5, help="probabilidad de prefijo PHP")
+    parser.add_argument("--latencia-ms", type=float, default=0)
+    parser.add_argument("--prob-429", type=float, default=0.0)
+    parser.add_argument("--prob-5xx", type=float, default=0.0)
+    parser.add_argument("--semilla", type=int, default=0)
+
+
+def estado_desde_argumentos(args):
+    """Construye el ``EstadoMock`` a partir de los argumentos."""
+    return EstadoMock(
+        productos=args.productos,
+        ordenes=args.ordenes,
+        dias=args.dias,
+        prob_aviso=args.prob_aviso,
+        latencia_ms=args.latencia_ms,
+        prob_429=args.prob_429,
+        prob_5xx=args.prob_5xx,
+        semilla=args.semilla,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor WooCommerce simulado")
+    agregar_argumentos(parser)
+    parser.add_argument("--puerto", type=int, default=8765)
+    args = parser.parse_args()
+    servidor, url = iniciar(estado_desde_argumentos(args), args.puerto)
+    print(f"🧪 Servidor mock en {url} ({args.productos} productos, {args.ordenes} órdenes)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
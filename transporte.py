@@ -0,0 +1,86 @@
+"""Transporte HTTP con pool de conexiones persistentes para la API de WooCommerce.
+
+``woocommerce.API`` hace cada llamada con ``requests.request``, que abre una
+sesión nueva (y un handshake TLS nuevo) por petición. ``ClienteWC`` expone la
+misma interfaz ``get(endpoint, params=...)`` sobre una ``requests.Session``
+compartida con keep-alive, un pool dimensionado para los workers
+concurrentes, compresión negociada (gzip/deflate, y br si ``brotli`` está
+instalado) y timeouts separados de conexión y lectura.
+"""
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib.parse import urlencode
+from woocommerce.oauth import OAuth
+
+try:
+    import brotli  # urllib3 lo usa para decodificar br
+    CODIFICACIONES = "gzip, deflate, br"
+except ImportError:
+    CODIFICACIONES = "gzip, deflate"
+
+
+def crear_sesion(tamano_pool):
+    """Crea una sesión con keep-alive y un pool de ``tamano_pool`` conexiones por host."""
+    sesion = Session()
+    adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=tamano_pool, pool_block=True)
+    sesion.mount("https://", adaptador)
+    sesion.mount("http://", adaptador)
+    sesion.headers.update({
+        "Accept": "application/json",
+        "Accept-Encoding": CODIFICACIONES,
+        "Connection": "keep-alive",
+        "User-Agent": "wp-prices",
+    })
+    return sesion
+
+
+class ClienteWC:
+    """Cliente de la API REST de WordPress/WooCommerce sobre una sesión compartida."""
+
+    def __init__(self, url, consumer_key, consumer_secret, version="wc/v3",
+                 timeout=(10, 30), verify_ssl=True, sesion=None, tamano_pool=10):
+        self.version = version
+        self.timeout = timeout
+        self.verify_ssl = verify_ssl
+        self.sesion = sesion or crear_sesion(tamano_pool)
+        self.configurar(url, consumer_key, consumer_secret)
+
+    def configurar(self, url, consumer_key, consumer_secret):
+        """Apunta el cliente a otra tienda (mismo objeto, para quien ya lo importó)."""
+        self.url = url if url.endswith("/") else f"{url}/"
+        self.consumer_key = consumer_key
+        self.consumer_secret = consumer_secret
+        self.es_ssl = self.url.startswith("https")
+        self.auth = HTTPBasicAuth(consumer_key, consumer_secret) if self.es_ssl else None
+
+    def _url(self, endpoint):
+        """URL completa de ``endpoint`` en el namespace del cliente."""
+        return f"{self.url}wp-json/{self.version}/{endpoint}"
+
+    def get(self, endpoint, params=None, **kwargs):
+        """GET a ``endpoint``; devuelve la ``requests.Response``."""
+        url = self._url(endpoint)
+        params = dict(params or {})
+        if not self.es_ssl:
+            # Sin HTTPS WooCommerce exige OAuth 1.0a firmado en la URL
+            url = OAuth(
+                url=f"{url}?{urlencode(params)}" if params else url,
+                consumer_key=self.consumer_key,
+                consumer_secret=self.consumer_secret,
+                version=self.version,
+                method="GET",
+            ).get_oauth_url()
+            params = None
+        return self.sesion.get(
+            url,
+            params=params,
+            auth=self.auth,
+            timeout=self.timeout,
+            verify=self.verify_ssl,
+            **kwargs,
+        )
+
+    def cerrar(self):
+        """Cierra las conexiones del pool."""
+        self.sesion.close()
@@ -0,0 +1,105 @@
+"""Variaciones de los productos variables.
+
+El producto padre de un producto variable no tiene precio ni stock propios:
+los tienen sus variaciones, que se piden a ``/products/<id>/variations``.
+Para no caer en una petición secuencial por producto, las consultas se
+reparten en un pool de hilos que comparte el planificador (misma tasa que
+el resto de la extracción) y los resultados se guardan en una caché en
+disco con TTL (``variaciones_ttl_horas``), como las visitas.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import pandas as pd
+
+import cache_disco
+from config import CONFIG
+from paginacion import obtener_pagina, total_paginas
+import progreso
+from proyecciones import CAMPOS_VARIACIONES
+
+COLUMNAS = ['id', 'padre_id', 'sku', 'precio_actual', 'precio_oferta', 'stock', 'atributos']
+
+
+def cargar_cache(ruta=None):
+    """Carga la caché ``{padre_id: [variaciones, timestamp]}`` (vacía si no existe)."""
+    return cache_disco.cargar_por_id(CONFIG["variaciones_cache"] if ruta is None else ruta, "Caché de variaciones")
+
+
+def guardar_cache(cache, ruta=None):
+    """Escribe la caché de forma atómica."""
+    cache_disco.guardar(cache, CONFIG["variaciones_cache"] if ruta is None else ruta)
+
+
+def _fila_variacion(padre_id, variacion):
+    """Convierte una variación de la API en una fila del DataFrame"""
+    return {
+        'id': variacion['id'],
+        'padre_id': padre_id,
+        'sku': variacion.get('sku'),
+        'precio_actual': variacion.get('regular_price'),
+        'precio_oferta': variacion.get('sale_price'),
+        'stock': variacion.get('stock_quantity'),
+        'atributos': ", ".join(
+            str(a.get('option')) for a in variacion.get('attributes') or [] if a.get('option')
+        ),
+    }
+
+
+def consultar_variaciones(padre_id):
+    """Pide todas las variaciones de un producto (``None`` si falla alguna página)."""
+    endpoint = f"products/{padre_id}/variations"
+    params = {"per_page": CONFIG["per_page"]}
+    if CONFIG["proyeccion_campos"]:
+        params["_fields"] = ",".join(CAMPOS_VARIACIONES)
+
+    # Casi siempre cabe todo en una página: no se abre otra ventana de workers
+    data, response = obtener_pagina(endpoint, params, 1)
+    if data is None:
+        return None
+    variaciones = list(data)
+    for page in range(2, (total_paginas(response) or 1) + 1):
+        data, _ = obtener_pagina(endpoint, params, page)
+        if data is None:
+            return None
+        variaciones.extend(data)
+    return [_fila_variacion(padre_id, v) for v in variaciones]
+
+
+def obtener_variaciones(ids):
+    """Devuelve las filas de variación de los productos ``ids`` usando la caché."""
+    cache = cargar_cache()
+    ahora = time.time()
+    pendientes = cache_disco.pendientes(cache, ids, CONFIG["variaciones_ttl_horas"], ahora)
+
+    if pendientes:
+        print(f"   🧩 Consultando variaciones de {len(pendientes)} productos variables "
+              f"({len(ids) - len(pendientes)} en caché)...")
+        with ThreadPoolExecutor(max_workers=CONFIG["paginas_concurrentes"]) as pool:
+            resultados = list(pool.map(consultar_variaciones, pendientes))
+        fallidos = []
+        for padre_id, filas in zip(pendientes, resultados):
+            if filas is None:
+                fallidos.append(padre_id)
+            else:
+                cache[padre_id] = [filas, ahora]
+        guardar_cache(cache)
+        if fallidos:
+            print(f"   ⚠️ {len(fallidos)} productos sin variaciones, se usan los datos del padre")
+            progreso.registrar_incompleta(
+                "variaciones", f"({len(fallidos)} productos: {', '.join(map(str, fallidos[:20]))})"
+            )
+
+    return [fila for i in ids if i in cache for fila in cache[i][0]]
+
+
+def extraer_variaciones(df_productos):
+    """DataFrame con las variaciones de los productos variables de ``df_productos``"""
+    if df_productos.empty or 'tipo' not in df_productos:
+        return pd.DataFrame(columns=COLUMNAS)
+    ids = [int(i) for i in df_productos.loc[df_productos['tipo'] == 'variable', 'id']]
+    if not ids:
+        return pd.DataFrame(columns=COLUMNAS)
+    filas = obtener_variaciones(ids)
+    print(f"🧩 Total variaciones: {len(filas)} ({len(ids)} productos variables)")
+    return pd.DataFrame(filas, columns=COLUMNAS)
@@ -0,0 +1,82 @@
+"""Ventas agregadas por el servidor con WooCommerce Analytics.
+
+``analizar_datos`` solo usa, por producto (y variación), unidades,
+facturación y número de órdenes. En vez de descargar todas las órdenes,
+``wc-analytics/reports/products`` y ``reports/variations`` devuelven esas
+sumas ya calculadas para un rango de fechas: una fila por producto o
+variación, unas pocas páginas por ventana.
+
+El resultado es un ``df_ventas`` agregado (columnas ``COLUMNAS``) con una
+fila por producto, variación y ventana (``dias``), que ``analizar_datos``
+acepta en lugar de las líneas de venta. Si Analytics no responde se
+devuelve ``None`` y se usa la extracción de órdenes.
+
+Los estados de orden que cuentan los define la configuración de Analytics
+de la tienda ("Estados excluidos"), no ``estados_validos``.
+"""
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import config
+from paginacion import iterar_paginas
+
+COLUMNAS = ['producto_id', 'variacion_id', 'cantidad', 'total', 'num_ordenes', 'dias']
+
+
+def _reporte(endpoint, desde, hasta, etiqueta):
+    """Todas las filas de ``reports/<endpoint>`` en el rango; ``None`` si falla alguna página."""
+    params = {"after": desde.isoformat(timespec="seconds"), "before": hasta.isoformat(timespec="seconds")}
+    estado = {}
+    filas = []
+    for data in iterar_paginas(f"reports/{endpoint}", params, etiqueta, estado=estado, cliente=config.analyticsapi):
+        filas.extend(data)
+    return filas if estado["completo"] else None
+
+
+def _agregado(productos, variaciones, dias):
+    """Filas de ``COLUMNAS`` de una ventana.
+
+    Las variaciones van con su ``variacion_id``; lo que el reporte de
+    productos tiene de más sobre sus variaciones (productos simples o
+    ventas sin variación) queda en una fila con ``variacion_id`` 0.
+    """
+    columnas = {'product_id': 'producto_id', 'items_sold': 'cantidad', 'net_revenue': 'total',
+                'orders_count': 'num_ordenes'}
+    por_producto = pd.DataFrame(productos, columns=list(columnas)).rename(columns=columnas)
+    por_variacion = pd.DataFrame(
+        variaciones, columns=[*columnas, 'variation_id']
+    ).rename(columns={**columnas, 'variation_id': 'variacion_id'})
+    por_variacion = por_variacion[por_variacion['variacion_id'].fillna(0).astype('int64') > 0]
+
+    medidas = ['cantidad', 'total', 'num_ordenes']
+    resto = por_producto.set_index('producto_id')[medidas].astype('float64').sub(
+        por_variacion.groupby('producto_id')[medidas].sum(), fill_value=0
+    ).clip(lower=0).reset_index().assign(variacion_id=0)
+    resto = resto[resto['cantidad'] > 0]
+    return pd.concat([por_variacion, resto], ignore_index=True)[COLUMNAS[:-1]].assign(dias=dias)
+
+
+def extraer_ventas_analytics(ventanas):
+    """``df_ventas`` agregado para cada ventana de ``ventanas`` (días); ``None`` si Analytics no responde."""
+    hasta = datetime.now()
+    agregados = []
+    for dias in sorted(set(ventanas)):
+        desde = hasta - timedelta(days=dias)
+        print(f"   📈 Analytics: últimos {dias} días")
+        productos = _reporte("products", desde, hasta, "productos vendidos")
+        if productos is None:
+            print("   ⚠️ WooCommerce Analytics no disponible, se extraen las órdenes")
+            return None
+        variaciones = _reporte("variations", desde, hasta, "variaciones vendidas")
+        if variaciones is None:
+            # Sin detalle por variación todo queda al precio del producto padre
+            print("   ⚠️ Sin reporte de variaciones, las ventas se comparan contra el precio del padre")
+            variaciones = []
+        agregados.append(_agregado(productos, variaciones, dias))
+
+    df_ventas = pd.concat(agregados, ignore_index=True)
+    return df_ventas.astype({
+        'producto_id': 'int32', 'variacion_id': 'int32', 'cantidad': 'int32',
+        'total': 'float64', 'num_ordenes': 'int32', 'dias': 'int32',
+    })
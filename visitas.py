@@ -0,0 +1,116 @@
+"""Visitas por producto desde el endpoint de Post Views Counter.
+
+Consulta ``/wp-json/post-views-counter/get-post-views/<id>`` para cada
+producto con un pool de hilos acotado y guarda los resultados en una caché
+en disco con TTL, para no repetir miles de llamadas en cada ejecución. Si el
+endpoint falla para un producto se conserva el valor leído de ``meta_data``.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import cache_disco
+import config
+from config import CONFIG
+from decodificador import decodificar_respuesta
+from planificador import Planificador
+
+# El endpoint es más liviano que /products: tiene su propia tasa
+planificador_visitas = Planificador(tasa_max=CONFIG["visitas_peticiones_por_segundo"])
+
+
+def cargar_cache(ruta=None):
+    """Carga la caché ``{id: [visitas, timestamp]}`` (vacía si no existe)."""
+    return cache_disco.cargar_por_id(CONFIG["visitas_cache"] if ruta is None else ruta, "Caché de visitas")
+
+
+def guardar_cache(cache, ruta=None):
+    """Escribe la caché de forma atómica."""
+    cache_disco.guardar(cache, CONFIG["visitas_cache"] if ruta is None else ruta)
+
+
+def _parsear_visitas(response):
+    """Lee el número de visitas de la respuesta (``1234``, ``"1234"`` o ``{"<id>": 1234}``)."""
+    valor = decodificar_respuesta(response)
+    if isinstance(valor, dict):
+        valor = next(iter(valor.values()), 0)
+    return int(valor)
+
+
+class EndpointAusente:
+    """Detecta que el endpoint no existe (API de Post Views Counter desactivada).
+
+    Tras ``limite`` respuestas 404 seguidas deja de consultarse por el resto
+    de la ejecución; una respuesta correcta reinicia la cuenta.
+    """
+
+    def __init__(self, limite):
+        self.limite = limite
+        self.seguidos = 0
+        self.activo = False
+        self.lock = threading.Lock()
+
+    def registrar(self, response):
+        if response is None:
+            return
+        with self.lock:
+            self.seguidos = self.seguidos + 1 if response.status_code == 404 else 0
+            if self.seguidos >= self.limite:
+                self.activo = True
+
+
+def consultar_visitas(producto_id, ausente=None):
+    """Pide las visitas de un producto al endpoint (``None`` si falla o el endpoint no existe)."""
+    if ausente is not None and ausente.activo:
+        return None
+    visitas, response = planificador_visitas.ejecutar(
+        lambda: config.pvcapi.get(f"get-post-views/{producto_id}"),
+        procesar=_parsear_visitas,
+        etiqueta=f"Visitas {producto_id}",
+        endpoint="get-post-views",
+    )
+    if ausente is not None:
+        ausente.registrar(response)
+    return visitas
+
+
+def obtener_visitas(ids):
+    """Devuelve ``{id: visitas}`` usando la caché y consultando solo los vencidos.
+
+    Los productos cuya consulta falla no aparecen (ni con el valor vencido de
+    la caché), así que para ellos queda el de ``meta_data``.
+    """
+    cache = cargar_cache()
+    ahora = time.time()
+    pendientes = cache_disco.pendientes(cache, ids, CONFIG["visitas_ttl_horas"], ahora)
+
+    if pendientes:
+        print(f"   👀 Consultando visitas de {len(pendientes)} productos "
+              f"({len(ids) - len(pendientes)} en caché)...")
+        ausente = EndpointAusente(CONFIG["visitas_max_404"])
+        with ThreadPoolExecutor(max_workers=CONFIG["visitas_concurrentes"]) as pool:
+            resultados = list(pool.map(lambda i: consultar_visitas(i, ausente), pendientes))
+        fallidos = 0
+        for producto_id, visitas in zip(pendientes, resultados):
+            if visitas is None:
+                fallidos += 1
+                cache.pop(producto_id, None)
+            else:
+                cache[producto_id] = [visitas, ahora]
+        guardar_cache(cache)
+        if ausente.activo:
+            print(f"   ⚠️ El endpoint de visitas responde 404 (¿API de Post Views Counter desactivada?), "
+                  "se usa meta_data")
+        elif fallidos:
+            print(f"   ⚠️ {fallidos} productos sin respuesta, se usa meta_data")
+
+    return {i: cache[i][0] for i in ids if i in cache}
+
+
+def completar_visitas(df_productos):
+    """Reemplaza la columna ``visitas`` por el valor del endpoint donde esté disponible."""
+    if df_productos.empty:
+        return df_productos
+    visitas = obtener_visitas([int(i) for i in df_productos['id']])
+    df_productos['visitas'] = df_productos['id'].map(visitas).fillna(df_productos['visitas']).astype(int)
+    return df_productos